@@ -1,8 +1,20 @@
+import contextlib
+import hashlib
 import io
-from typing import Dict, Optional, Tuple
-
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import openpyxl
 import pandas as pd
 import streamlit as st
+from pandas.io.parsers import TextParser
 
 
 DEFAULT_CAPACITY_COLUMNS = {
@@ -67,6 +79,49 @@ DEGREE_TO_CAPACITY_COL = {
     "DOCTOR": "PHD",
 }
 
+# Kľúče porovnávame po strip/upper, preto aj lookup musí byť veľkými písmenami
+DEGREE_LOOKUP = {key.upper(): value for key, value in DEGREE_TO_CAPACITY_COL.items()}
+
+ROW_ID_COL = "_row_id"
+
+# Pamäťový limit zdieľanej cache (spoločná pre všetky relácie procesu)
+CACHE_BUDGET_MB = int(os.environ.get("NOMINACIE_CACHE_MB", "512"))
+
+# Adresár archívov kôl určuje prevádzka; používateľ volí len názov súboru v ňom
+ARCHIVE_DIR = os.environ.get("NOMINACIE_ARCHIVE_DIR", "archiv")
+ARCHIVE_NAME_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+
+# Počet riadkov rýchleho náhľadu pri zmene riadku hlavičky
+PREVIEW_ROWS = 10
+
+REASON_PRIORITY_FILTER = "priority_filter"
+REASON_OVER_CAPACITY = "over_capacity"
+REASON_WITHIN_CAPACITY = "within_capacity"
+REASON_CYCLE_RELEASED = "cycle_released"
+REASON_CYCLE_KEPT = "cycle_kept"
+REASON_NO_DUPLICATE = "no_duplicate"
+
+REASON_LABELS = {
+    REASON_PRIORITY_FILTER: "Vyřazeno – nižší priorita než nominace",
+    REASON_OVER_CAPACITY: "Nad kapacitu školy",
+    REASON_WITHIN_CAPACITY: "V rámci kapacity školy",
+    REASON_CYCLE_RELEASED: "Cyklus – místo uvolněno",
+    REASON_CYCLE_KEPT: "Cyklus – ponecháno beze změny",
+    REASON_NO_DUPLICATE: "Vyřazeno – na škole není duplicita",
+}
+
+REASON_STATUS = {
+    REASON_PRIORITY_FILTER: "Vyřazen",
+    REASON_OVER_CAPACITY: "Nepřijat",
+    REASON_WITHIN_CAPACITY: "Přijat",
+    REASON_CYCLE_RELEASED: "Vyřazen",
+    REASON_CYCLE_KEPT: "Vyřazen",
+    REASON_NO_DUPLICATE: "Vyřazen",
+}
+
+# ExplanationLog drží dôvody ako int8 kódy (poradie REASON_LABELS)
+REASON_CODES = {reason: code for code, reason in enumerate(REASON_LABELS)}
+
 
 st.set_page_config(page_title="Nominácie – workflow", layout="wide")
 
@@ -94,21 +149,250 @@ with st.sidebar:
                " Ak stĺpce nesedia, upravte mapovanie.")
 
 
-def read_uploaded_table(file, sheet_name=None, header_row: int = 0) -> pd.DataFrame:
-    name = file.name.lower()
-    if name.endswith(".csv"):
-        return pd.read_csv(file)
-    data = io.BytesIO(file.getvalue())
-    return pd.read_excel(data, sheet_name=sheet_name, header=header_row)
-
+def excel_cell_value(cell) -> Any:
+    """Hodnota bunky tak, ako ju vracia pd.read_excel s enginom openpyxl."""
+    if cell.value is None:
+        return ""
+    if cell.data_type == "e":
+        return np.nan
+    if cell.data_type == "n":
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def trim_rows(rows: list) -> list:
+    """Orezanie prázdnych buniek a riadkov na konci a doplnenie na rovnakú šírku."""
+    trimmed = []
+    last_with_data = -1
+    for row in rows:
+        end = len(row)
+        while end and row[end - 1] == "":
+            end -= 1
+        if end:
+            last_with_data = len(trimmed)
+        trimmed.append(row[:end])
+    trimmed = trimmed[: last_with_data + 1]
+    width = max((len(row) for row in trimmed), default=0)
+    return [row + [""] * (width - len(row)) for row in trimmed]
+
+
+def rows_to_frame(rows: list, header_row: int, nrows: Optional[int] = None) -> pd.DataFrame:
+    """Surové riadky hárku → DataFrame rovnako ako pd.read_excel(header=...)."""
+    if not rows:
+        return pd.DataFrame()
+    return TextParser(rows, header=header_row, nrows=nrows, skip_blank_lines=False).read()
+
+
+def estimate_rows_size(rows: list) -> int:
+    """Odhad pamäte surových riadkov podľa vzorky (~200 riadkov)."""
+    if not rows:
+        return 0
+    sample = rows[:: max(1, len(rows) // 200)]
+    per_row = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in sample
+    ) / len(sample)
+    return sys.getsizeof(rows) + int(per_row * len(rows))
+
+
+class WorkbookHandle:
+    """Nahraný súbor otvorený raz pre všetky reruny.
+
+    XLSX sa otvorí cez openpyxl v režime read_only a hárky sa streamujú až
+    na požiadanie. Surové riadky každého celého načítaného hárku zostávajú
+    v pamäti (jeden zošit môže slúžiť pre kapacity aj prihlášky), takže
+    zmena riadku hlavičky už zošit znova neparsuje.
+    Handle žije v zdieľanej cache a jeho veľkosť (súbor + riadky) sa
+    započítava do jej limitu.
+    """
 
-def get_excel_sheets(file) -> Optional[list]:
-    name = file.name.lower()
-    if not (name.endswith(".xlsx") or name.endswith(".xls")):
+    def __init__(self, name: str, digest: str, data: bytes) -> None:
+        self.name = name.lower()
+        self.digest = digest
+        self._data = data
+        self._lock = threading.Lock()
+        self._workbook = None
+        self._excel = None
+        self._rows: Dict[str, list] = {}
+        self._rows_nbytes: Dict[str, int] = {}
+        if self.name.endswith((".xlsx", ".xlsm")):
+            self._workbook = openpyxl.load_workbook(
+                io.BytesIO(data), read_only=True, data_only=True, keep_links=False
+            )
+        elif self.name.endswith(".xls"):
+            # Starý formát openpyxl nečíta, pandas ho otvorí cez xlrd
+            self._excel = pd.ExcelFile(io.BytesIO(data))
+
+    @property
+    def sheet_names(self) -> Optional[list]:
+        if self._workbook is not None:
+            return list(self._workbook.sheetnames)
+        if self._excel is not None:
+            return list(self._excel.sheet_names)
         return None
-    data = io.BytesIO(file.getvalue())
-    xls = pd.ExcelFile(data)
-    return xls.sheet_names
+
+    def _sheet_rows(self, sheet_name: str, limit: Optional[int] = None) -> list:
+        """Surové riadky hárku; celý hárok sa podrží pre ďalšie volania."""
+        cached = self._rows.get(sheet_name)
+        if cached is not None:
+            return cached if limit is None else trim_rows(cached[:limit])
+
+        worksheet = self._workbook[sheet_name]
+        worksheet.reset_dimensions()
+        rows = []
+        for cells in worksheet.iter_rows():
+            rows.append([excel_cell_value(cell) for cell in cells])
+            if limit is not None and len(rows) >= limit:
+                break
+        rows = trim_rows(rows)
+        if limit is None:
+            self._rows[sheet_name] = rows
+            self._rows_nbytes[sheet_name] = estimate_rows_size(rows)
+        return rows
+
+    @property
+    def key(self) -> str:
+        return content_key("workbook", self.name, self.digest)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._data) + sum(self._rows_nbytes.values())
+
+    def read(self, sheet_name: Optional[str] = None, header_row: int = 0) -> pd.DataFrame:
+        with self._lock:
+            if self._workbook is not None:
+                sheet_name = sheet_name or self._workbook.sheetnames[0]
+                return rows_to_frame(self._sheet_rows(sheet_name), header_row)
+            if self._excel is not None:
+                return self._excel.parse(sheet_name or 0, header=header_row)
+            return pd.read_csv(io.BytesIO(self._data), header=header_row)
+
+    def preview(
+        self, sheet_name: Optional[str] = None, header_row: int = 0, nrows: int = PREVIEW_ROWS
+    ) -> pd.DataFrame:
+        """Prvých `nrows` riadkov pod hlavičkou; číta sa len začiatok hárku."""
+        with self._lock:
+            if self._workbook is not None:
+                sheet_name = sheet_name or self._workbook.sheetnames[0]
+                rows = self._sheet_rows(sheet_name, limit=header_row + 1 + nrows)
+                return rows_to_frame(rows, header_row, nrows=nrows)
+            if self._excel is not None:
+                return self._excel.parse(sheet_name or 0, header=header_row, nrows=nrows)
+            return pd.read_csv(io.BytesIO(self._data), header=header_row, nrows=nrows)
+
+
+def content_key(*parts: Any) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def file_digest(file) -> str:
+    return hashlib.sha256(file.getvalue()).hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (ExplanationLog, WorkbookHandle)):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class SharedCache:
+    """Procesová LRU cache načítaných vstupov a výsledkov krokov.
+
+    Kľúčom je hash obsahu, takže relácie s rovnakým zošitom zdieľajú tie
+    isté DataFrame objekty. Kroky výpočtu vstupy nemenia (pracujú na kópii),
+    preto relácie držia iba referencie.
+    """
+
+    def __init__(self, budget_bytes: int) -> None:
+        self.budget_bytes = budget_bytes
+        self._items: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: str, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.budget_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.size_bytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.size_bytes += size
+            while self.size_bytes > self.budget_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            # Výpočet beží mimo zámku, aby neblokoval ostatné relácie
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "size_bytes": self.size_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def get_shared_cache() -> SharedCache:
+    return SharedCache(CACHE_BUDGET_MB * 1024 * 1024)
+
+
+def uploaded_workbook(cache: SharedCache, file) -> WorkbookHandle:
+    """Otvorený zošit nahraného súboru (kľúčom je obsah, nie upload)."""
+    name, digest = file.name.lower(), file_digest(file)
+    return cache.get_or_compute(
+        content_key("workbook", name, digest),
+        lambda: WorkbookHandle(name, digest, file.getvalue()),
+    )
+
+
+def load_uploaded_table(
+    cache: SharedCache, workbook: WorkbookHandle, sheet_name=None, header_row: int = 0
+) -> Tuple[str, pd.DataFrame]:
+    """Načíta tabuľku cez zdieľanú cache; vráti aj kľúč obsahu."""
+    key = content_key("table", workbook.name, workbook.digest, sheet_name, header_row)
+
+    def read():
+        frame = workbook.read(sheet_name=sheet_name, header_row=header_row)
+        # Handle si podržal surové riadky hárku – prepočítaj jeho veľkosť v cache
+        cache.put(workbook.key, workbook)
+        return frame
+
+    return key, cache.get_or_compute(key, read)
 
 
 def build_column_mapper(
@@ -145,12 +429,272 @@ def get_col(mapper: Dict[str, str], key: str) -> Optional[str]:
     return value
 
 
+class ExplanationLog:
+    """Stĺpcový záznam dôvodov (row id, krok, iterácia, dôvod).
+
+    Kroky pridávajú celé polia naraz, takže záznam nepridáva prácu na riadok.
+    """
+
+    def __init__(self) -> None:
+        self._row_ids: list = []
+        self._steps: list = []
+        self._iterations: list = []
+        self._reasons: list = []
+
+    def record(self, row_ids: Iterable, step: int, iteration: int, reason: str) -> None:
+        ids = np.asarray(row_ids, dtype="int64")
+        if ids.size == 0:
+            return
+        self._row_ids.append(ids)
+        self._steps.append(np.full(ids.size, step, dtype="int8"))
+        self._iterations.append(np.full(ids.size, iteration, dtype="int16"))
+        self._reasons.append(np.full(ids.size, REASON_CODES[reason], dtype="int8"))
+
+    def extend(self, other: "ExplanationLog") -> None:
+        """Pripojí záznamy iného logu (polia sa zdieľajú, nekopírujú)."""
+        self._row_ids.extend(other._row_ids)
+        self._steps.extend(other._steps)
+        self._iterations.extend(other._iterations)
+        self._reasons.extend(other._reasons)
+
+    def __len__(self) -> int:
+        return sum(chunk.size for chunk in self._row_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            chunk.nbytes
+            for chunks in (self._row_ids, self._steps, self._iterations, self._reasons)
+            for chunk in chunks
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Záznamy ako DataFrame; kódy dôvodov sa až tu menia na kategórie."""
+        def joined(chunks, dtype):
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+        return pd.DataFrame(
+            {
+                ROW_ID_COL: joined(self._row_ids, "int64"),
+                "step": joined(self._steps, "int8"),
+                "iteration": joined(self._iterations, "int16"),
+                "reason": pd.Categorical.from_codes(
+                    joined(self._reasons, "int8"), categories=list(REASON_LABELS)
+                ),
+            }
+        )
+
+    def last_reasons(self) -> pd.DataFrame:
+        """Posledný zaznamenaný dôvod pre každý riadok, indexovaný podľa row id."""
+        events = self.to_frame()
+        last = events.drop_duplicates(subset=[ROW_ID_COL], keep="last").set_index(ROW_ID_COL)
+        labels = last["reason"].cat.rename_categories(REASON_LABELS)
+        statuses = last["reason"].map(REASON_STATUS)
+        return pd.DataFrame(
+            {
+                "Status přijetí": statuses.astype(object),
+                "Pomocné - důvod přijetí": labels.astype(object),
+            },
+            index=last.index,
+        )
+
+
+def init_working_sheet(applications: pd.DataFrame) -> pd.DataFrame:
+    """Kópia prihlášok so stabilným identifikátorom riadku pre záznam dôvodov."""
+    working = applications.copy()
+    working[ROW_ID_COL] = np.arange(len(working), dtype="int64")
+    return working
+
+
+def without_row_id(df: pd.DataFrame) -> pd.DataFrame:
+    """Tabuľka na zobrazenie / export – interný identifikátor riadku sa nezobrazuje."""
+    return df.drop(columns=ROW_ID_COL, errors="ignore")
+
+
+def apply_explanations(
+    df: pd.DataFrame,
+    explanations: Optional[ExplanationLog],
+    row_ids: Optional[pd.Series] = None,
+) -> pd.DataFrame:
+    """Doplní stĺpce 'Status přijetí' a 'Pomocné - důvod přijetí' jedným joinom.
+
+    Výsledok je určený na zobrazenie a archív, preto už neobsahuje stĺpec _row_id.
+    """
+    if explanations is None or not len(explanations):
+        return without_row_id(df)
+    if row_ids is None:
+        if ROW_ID_COL not in df.columns:
+            return df
+        row_ids = df[ROW_ID_COL]
+    reasons = explanations.last_reasons().reindex(pd.Index(row_ids)).fillna("")
+    result = without_row_id(df)
+    result["Status přijetí"] = reasons["Status přijetí"].to_numpy()
+    result["Pomocné - důvod přijetí"] = reasons["Pomocné - důvod přijetí"].to_numpy()
+    return result
+
+
+VALIDATION_ERROR = "chyba"
+VALIDATION_WARNING = "varovanie"
+
+# Stĺpce prihlášok, bez ktorých validate_inputs hlási chybu
+REQUIRED_APPLICATION_KEYS = (
+    "Číslo UK", "ID code", "Studying for degree", "NOMINOVÁN", "PRIORITA", "Pořadí"
+)
+
+
+def validate_inputs(
+    capacities: pd.DataFrame,
+    applications: pd.DataFrame,
+    cap_cols: Dict[str, str],
+    app_cols: Dict[str, str],
+) -> pd.DataFrame:
+    """Kontrola vstupov pred krokom 1, jeden vektorizovaný prechod na tabuľku.
+
+    Vráti report s jedným riadkom na problém. Riadky so závažnosťou
+    `VALIDATION_ERROR` znamenajú, že výpočet nemá zmysel spúšťať.
+    """
+    issues = []
+
+    def add_issue(table, column, check, severity, mask, values):
+        count = int(mask.sum())
+        if not count:
+            return
+        examples = pd.unique(values[mask].astype(str))[:5]
+        issues.append(
+            {
+                "Tabuľka": table,
+                "Stĺpec": column,
+                "Kontrola": check,
+                "Závažnosť": severity,
+                "Počet riadkov": count,
+                "Príklady": ", ".join(examples),
+            }
+        )
+
+    def missing_column(table, key):
+        issues.append(
+            {
+                "Tabuľka": table,
+                "Stĺpec": key,
+                "Kontrola": "Chýba mapovanie povinného stĺpca",
+                "Závažnosť": VALIDATION_ERROR,
+                "Počet riadkov": 0,
+                "Príklady": "",
+            }
+        )
+
+    def non_numeric(series):
+        present = series.notna() & (series.astype(str).str.strip() != "")
+        return present & pd.to_numeric(series, errors="coerce").isna()
+
+    # Kapacity
+    cap_id_col = get_col(cap_cols, "ID code")
+    if not cap_id_col:
+        missing_column("Kapacity", "ID code")
+    else:
+        cap_ids = capacities[cap_id_col]
+        # Úplne prázdny riadok (read_excel ho načíta ako samé NaN) krok 1 len
+        # započíta s nulami, nie je to chyba vstupu
+        blank_row = capacities.isna().all(axis=1)
+        add_issue("Kapacity", cap_id_col, "Prázdne ID code", VALIDATION_ERROR,
+                  cap_ids.isna() & ~blank_row, cap_ids)
+        add_issue("Kapacity", cap_id_col, "Duplicitné ID code", VALIDATION_ERROR,
+                  cap_ids.notna() & cap_ids.duplicated(keep=False), cap_ids)
+
+    # Krok 1 tieto stĺpce prepíše počtom nominácií, vstupné hodnoty čítajú
+    # až ďalšie kolá (remaining_capacities), preto stačí varovanie
+    for key in ("BC", "MGR", "PHD", "ALL"):
+        col = get_col(cap_cols, key)
+        if col:
+            add_issue("Kapacity", col, "Nečíselná kapacita (v ďalšom kole sa ráta ako 0)",
+                      VALIDATION_WARNING, non_numeric(capacities[col]), capacities[col])
+
+    # Prihlášky
+    app_col = {key: get_col(app_cols, key) for key in REQUIRED_APPLICATION_KEYS}
+    for key, col in app_col.items():
+        if not col:
+            missing_column("Prihlášky", key)
+
+    for key in ("PRIORITA", "Pořadí"):
+        col = app_col[key]
+        if col:
+            values = applications[col]
+            add_issue("Prihlášky", col, "Nečíselná hodnota", VALIDATION_ERROR,
+                      non_numeric(values), values)
+            add_issue("Prihlášky", col, "Prázdna hodnota", VALIDATION_WARNING,
+                      values.isna(), values)
+
+    nom_col = app_col["NOMINOVÁN"]
+    nominated = None
+    if nom_col:
+        nom = applications[nom_col].fillna("").astype(str).str.strip().str.upper()
+        nominated = nom == "ANO"
+        add_issue("Prihlášky", nom_col, "Neznáma hodnota (povolené ANO/NE)", VALIDATION_ERROR,
+                  ~nom.isin(["ANO", "NE", ""]), applications[nom_col])
+
+    degree_col = app_col["Studying for degree"]
+    if degree_col:
+        unknown = normalize_degrees(applications[degree_col]).isna()
+        if nominated is not None:
+            unknown &= nominated
+        add_issue("Prihlášky", degree_col,
+                  "Neznámy stupeň štúdia (nezapočíta sa do BC/MGR/PHD)", VALIDATION_WARNING,
+                  unknown, applications[degree_col])
+
+    uk_col = app_col["Číslo UK"]
+    id_col = app_col["ID code"]
+    if id_col and cap_id_col:
+        app_ids = applications[id_col]
+        add_issue("Prihlášky", id_col, "ID code bez riadku v kapacitách", VALIDATION_WARNING,
+                  app_ids.notna() & ~app_ids.isin(capacities[cap_id_col]), app_ids)
+
+    if uk_col and id_col:
+        pairs = applications[[uk_col, id_col]]
+        duplicated_pair = pairs.duplicated(keep=False)
+        add_issue("Prihlášky", f"{uk_col} + {id_col}", "Duplicitná prihláška", VALIDATION_WARNING,
+                  duplicated_pair, applications[uk_col])
+        if nom_col:
+            conflicting = (
+                nominated.groupby([applications[uk_col], applications[id_col]], dropna=False)
+                .transform("nunique")
+                > 1
+            )
+            add_issue("Prihlášky", nom_col, "Rozporné NOMINOVÁN pre tú istú prihlášku",
+                      VALIDATION_ERROR, conflicting, applications[uk_col])
+
+    return pd.DataFrame(
+        issues,
+        columns=["Tabuľka", "Stĺpec", "Kontrola", "Závažnosť", "Počet riadkov", "Príklady"],
+    )
+
+
+def normalize_degrees(values: pd.Series) -> pd.Series:
+    """Normalizuje stupeň štúdia na BC/MGR/PHD (neznáme hodnoty = NaN).
+
+    Lookup sa počíta iba nad unikátnymi hodnotami (kategóriami), riadky sa
+    potom len indexujú cez kódy kategórií.
+    """
+    categorical = values.astype("category")
+    categories = categorical.cat.categories
+    # Posledný prvok (None) zachytí kód -1, teda chýbajúce hodnoty
+    lookup = np.array(
+        [DEGREE_LOOKUP.get(str(value).strip().upper()) for value in categories] + [None],
+        dtype=object,
+    )
+    return pd.Series(lookup[categorical.cat.codes.to_numpy()], index=values.index)
+
+
 def compute_occupancy(
     capacities: pd.DataFrame,
     applications: pd.DataFrame,
     cap_cols: Dict[str, str],
     app_cols: Dict[str, str],
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+    """Krok 1: obsadenosť BC/MGR/PHD/ALL z riadkov s NOMINOVÁN = ANO.
+
+    Vráti upravené kapacity, nominované riadky a počty nominovaných riadkov,
+    ktoré sa nepodarilo priradiť (neznámy stupeň, ID code bez kapacity).
+    """
     id_code_col = get_col(cap_cols, "ID code")
     if not id_code_col:
         raise ValueError("Chýba stĺpec 'ID code' v kapacitách.")
@@ -164,52 +708,50 @@ def compute_occupancy(
             "Chýbajú povinné stĺpce v prihláškach: 'ID code', 'Studying for degree', 'NOMINOVÁN'."
         )
 
-    nominated = applications[applications[nominated_col].astype(str).str.upper() == "ANO"].copy()
+    # NOMINOVÁN má pár unikátnych hodnôt – porovnávame kategórie, nie riadky.
+    # Na rozdiel od pôvodnej verzie (iba upper) sa orezávajú aj medzery, rovnako
+    # ako v krokoch 2 a 6, v kontrole vstupov a v allSteps.ts: " ANO" sa započíta.
+    nominated_values = applications[nominated_col].astype("category")
+    ano_categories = (
+        nominated_values.cat.categories.astype(str).str.strip().str.upper() == "ANO"
+    )
+    is_nominated = np.append(ano_categories, False)[nominated_values.cat.codes.to_numpy()]
+    nominated = applications[is_nominated].copy()
+    nominated["_degree_norm"] = normalize_degrees(nominated[degree_col])
     nominated[degree_col] = nominated[degree_col].astype(str).str.strip().str.upper()
 
-    def normalize_degree(value: str) -> Optional[str]:
-        return DEGREE_TO_CAPACITY_COL.get(value)
-
-    nominated["_degree_norm"] = nominated[degree_col].map(normalize_degree)
-
-    grouped = (
-        nominated.dropna(subset=["_degree_norm"])
-        .groupby([app_id_code_col, "_degree_norm"], dropna=False)
+    # Jedna krížová tabuľka (ID code × stupeň); neznámy stupeň ide len do ALL
+    degree_keys = nominated["_degree_norm"].fillna("_unknown")
+    counts = (
+        degree_keys.groupby([nominated[app_id_code_col], degree_keys])
         .size()
-        .reset_index(name="_count")
+        .unstack(fill_value=0)
     )
+    counts["ALL"] = counts.sum(axis=1)
+    counts = counts.reindex(columns=["BC", "MGR", "PHD", "ALL"], fill_value=0)
 
-    all_grouped = (
-        nominated.groupby(app_id_code_col, dropna=False)
-        .size()
-        .reset_index(name="_count_all")
-    )
+    # Jeden join na kapacity (reindex znesie aj duplicitné ID code a iný dtype kľúča)
+    aligned = counts.reindex(capacities[id_code_col]).fillna(0).astype(int)
 
     result = capacities.copy()
-
-    for degree, col_name in [
-        ("BC", "BC"),
-        ("MGR", "MGR"),
-        ("PHD", "PHD"),
-    ]:
-        cap_col = get_col(cap_cols, col_name)
+    for degree in ("BC", "MGR", "PHD", "ALL"):
+        cap_col = get_col(cap_cols, degree)
         if cap_col:
-            counts = grouped[grouped["_degree_norm"] == degree].set_index(app_id_code_col)[
-                "_count"
-            ]
-            result[cap_col] = result[id_code_col].map(counts).fillna(0).astype(int)
+            result[cap_col] = aligned[degree].to_numpy()
 
-    all_col = get_col(cap_cols, "ALL")
-    if all_col:
-        all_counts = all_grouped.set_index(app_id_code_col)["_count_all"]
-        result[all_col] = result[id_code_col].map(all_counts).fillna(0).astype(int)
+    unmatched = {
+        "degree": int(nominated["_degree_norm"].isna().sum()),
+        "id_code": int((~nominated[app_id_code_col].isin(capacities[id_code_col])).sum()),
+    }
 
-    return result, nominated
+    return result, nominated, unmatched
 
 
 def filter_duplicates_by_priority(
     working_df: pd.DataFrame,
     app_cols: Dict[str, str],
+    explanations: Optional[ExplanationLog] = None,
+    iteration: int = 1,
 ) -> pd.DataFrame:
     uk_col = get_col(app_cols, "Číslo UK")
     nom_col = get_col(app_cols, "NOMINOVÁN")
@@ -236,10 +778,15 @@ def filter_duplicates_by_priority(
     filtered = (
         df.groupby(uk_col, dropna=False, group_keys=False)
         .apply(filter_group)
-        .reset_index(drop=True)
     )
 
-    return filtered
+    if explanations is not None and ROW_ID_COL in df.columns:
+        dropped = df.index.difference(filtered.index)
+        explanations.record(
+            df.loc[dropped, ROW_ID_COL], 2, iteration, REASON_PRIORITY_FILTER
+        )
+
+    return filtered.reset_index(drop=True)
 
 
 def normalize_ordering_by_id_code(
@@ -274,6 +821,9 @@ def build_result_table(
     capacities_df: pd.DataFrame,
     cap_cols: Dict[str, str],
     app_cols: Dict[str, str],
+    explanations: Optional[ExplanationLog] = None,
+    iteration: int = 1,
+    round_number: int = 1,
 ) -> pd.DataFrame:
     cap_id_col = get_col(cap_cols, "ID code")
     cap_all_col = get_col(cap_cols, "ALL")
@@ -314,10 +864,17 @@ def build_result_table(
         selected_rows.append(group_sorted.head(cap))
 
     if selected_rows:
-        selected = pd.concat(selected_rows, ignore_index=True)
+        selected = pd.concat(selected_rows)
     else:
         selected = df.head(0).copy()
 
+    if explanations is not None and ROW_ID_COL in df.columns:
+        over_capacity = df.index.difference(selected.index)
+        explanations.record(selected[ROW_ID_COL], 4, iteration, REASON_WITHIN_CAPACITY)
+        explanations.record(
+            df.loc[over_capacity, ROW_ID_COL], 4, iteration, REASON_OVER_CAPACITY
+        )
+
     output_columns = [
         "Institut",
         "Domácí katedra",
@@ -340,9 +897,14 @@ def build_result_table(
         src = get_col(app_cols, col)
         if src and src in selected.columns:
             result[col] = selected[src].values
+        elif col == "Rozřazovací kolo":
+            result[col] = round_number
         else:
             result[col] = ""
 
+    if ROW_ID_COL in selected.columns:
+        result[ROW_ID_COL] = selected[ROW_ID_COL].values
+
     return result
 
 
@@ -392,6 +954,8 @@ def resolve_duplicate_cycles(
     capacities_df: pd.DataFrame,
     cap_cols: Dict[str, str],
     app_cols: Dict[str, str],
+    explanations: Optional[ExplanationLog] = None,
+    iteration: int = 1,
 ) -> pd.DataFrame:
     """Krok 6: Analýza a riešenie cyklov duplicít.
     
@@ -533,7 +1097,9 @@ def resolve_duplicate_cycles(
         
         return True
 
-    rows_to_delete = set()
+    released_rows = set()
+    kept_rows = set()
+    no_duplicate_rows = set()
     cycles = find_cycles()
     
     for cycle in cycles:
@@ -543,12 +1109,12 @@ def resolve_duplicate_cycles(
             # Všetci by sa dostali → zmaž ANO záznamy (prepusti miesta)
             for uk in cycle_uks:
                 ano_idx = df[(df[uk_col] == uk) & (df[nom_col] == "ANO")].index
-                rows_to_delete.update(ano_idx)
+                released_rows.update(ano_idx)
         else:
             # Nie všetci by sa dostali → zmaž NE záznamy (zachovaj status quo)
             for uk in cycle_uks:
                 ne_idx = df[(df[uk_col] == uk) & (df[nom_col] == "NE")].index
-                rows_to_delete.update(ne_idx)
+                kept_rows.update(ne_idx)
     
     # Spracuj aj študentov mimo cyklov (možnosť 1 z pôvodného popisu)
     processed_uks = set()
@@ -581,12 +1147,468 @@ def resolve_duplicate_cycles(
             
             if not any_has_duplicate:
                 # Žiadny ANO na tej škole nemá duplicitu → zmaž NE
-                rows_to_delete.add(ne_row.name)
+                no_duplicate_rows.add(ne_row.name)
+
+    if explanations is not None and ROW_ID_COL in df.columns:
+        for rows, reason in [
+            (released_rows, REASON_CYCLE_RELEASED),
+            (kept_rows, REASON_CYCLE_KEPT),
+            (no_duplicate_rows, REASON_NO_DUPLICATE),
+        ]:
+            explanations.record(df.loc[list(rows), ROW_ID_COL], 6, iteration, reason)
 
+    rows_to_delete = released_rows | kept_rows | no_duplicate_rows
     result = df.drop(index=list(rows_to_delete)).reset_index(drop=True)
     return result
 
 
+def remaining_capacities(
+    capacities_df: pd.DataFrame,
+    accepted_df: pd.DataFrame,
+    cap_cols: Dict[str, str],
+) -> pd.DataFrame:
+    """Kapacity, ktoré po predchádzajúcich kolách ešte zostali voľné.
+
+    `capacities_df` sú ponúkané miesta zo vstupného hárku 1 (nie výstup kroku 1,
+    ten obsahuje obsadenosť). `accepted_df` je výsledná tabuľka (stĺpce podľa
+    výstupu kroku 4) so všetkými doteraz prijatými.
+    """
+    cap_id_col = get_col(cap_cols, "ID code")
+    if not cap_id_col:
+        raise ValueError("Chýba stĺpec 'ID code' v kapacitách.")
+
+    result = capacities_df.copy()
+    seat_cols = {
+        key: col
+        for key, col in ((key, get_col(cap_cols, key)) for key in ("BC", "MGR", "PHD", "ALL"))
+        if col and col in result.columns
+    }
+    for col in seat_cols.values():
+        result[col] = pd.to_numeric(result[col], errors="coerce").fillna(0).astype(int)
+    if accepted_df is None or accepted_df.empty:
+        return result
+
+    accepted = pd.DataFrame(
+        {
+            "ID code": key_as_text(accepted_df["ID code"]),
+            "_degree_norm": normalize_degrees(accepted_df["Studying for degree"]),
+        }
+    )
+
+    taken_all = accepted.groupby("ID code").size()
+    taken_by_degree = accepted.dropna(subset=["_degree_norm"]).groupby(
+        ["ID code", "_degree_norm"]
+    ).size()
+
+    # Kľúče na oboch stranách v jednotnom tvare, inak 101 a 101.0 obsadia dve miesta
+    cap_ids = key_as_text(result[cap_id_col])
+    for key, cap_col in seat_cols.items():
+        if key == "ALL":
+            taken = taken_all
+        elif key in taken_by_degree.index.get_level_values("_degree_norm"):
+            taken = taken_by_degree.xs(key, level="_degree_norm")
+        else:
+            continue
+        used = cap_ids.map(taken).fillna(0).astype(int)
+        result[cap_col] = (result[cap_col] - used).clip(lower=0)
+
+    return result
+
+
+def prepare_next_round(
+    capacities_df: pd.DataFrame,
+    accepted_df: pd.DataFrame,
+    new_applications: pd.DataFrame,
+    cap_cols: Dict[str, str],
+    app_cols: Dict[str, str],
+    explanations: Optional[ExplanationLog] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+    """Pripraví ďalšie rozraďovacie kolo z nových alebo zmenených prihlášok.
+
+    Študenti prijatí v predchádzajúcich kolách si miesto ponechávajú, preto sa
+    ich nové riadky ignorujú. Riadky na školy bez voľného miesta sa do výpočtu
+    vôbec nedostanú, takže kroky 2–6 bežia len nad otvorenými miestami.
+    """
+    uk_col = get_col(app_cols, "Číslo UK")
+    id_col = get_col(app_cols, "ID code")
+    cap_id_col = get_col(cap_cols, "ID code")
+    cap_all_col = get_col(cap_cols, "ALL")
+
+    if not uk_col or not id_col or not cap_id_col:
+        raise ValueError("Chýbajú povinné stĺpce pre ďalšie kolo: 'Číslo UK', 'ID code'.")
+
+    remaining = remaining_capacities(capacities_df, accepted_df, cap_cols)
+    working = init_working_sheet(new_applications)
+
+    # Pri opakovanom podaní (Číslo UK + ID code) platí posledný riadok
+    before_dedup = len(working)
+    working = working.drop_duplicates(subset=[uk_col, id_col], keep="last")
+    changed = before_dedup - len(working)
+
+    # Kľúče porovnávame v jednotnom tvare (int a float z rôznych súborov)
+    accepted_uks = set()
+    if accepted_df is not None and not accepted_df.empty:
+        accepted_uks = set(key_as_text(accepted_df["Číslo UK"]).dropna())
+    already_accepted = key_as_text(working[uk_col]).isin(accepted_uks)
+
+    # Rovnaké pravidlo ako v kroku 4: ALL, inak súčet BC/MGR/PHD
+    if cap_all_col and cap_all_col in remaining.columns:
+        seat_cols = [cap_all_col]
+    else:
+        seat_cols = [
+            col
+            for col in (get_col(cap_cols, key) for key in ("BC", "MGR", "PHD"))
+            if col and col in remaining.columns
+        ]
+    seats = remaining[seat_cols].apply(pd.to_numeric, errors="coerce").fillna(0).sum(axis=1)
+    seats.index = key_as_text(remaining[cap_id_col])
+    seats = seats[~seats.index.duplicated(keep="first")]
+    no_seat = key_as_text(working[id_col]).map(seats).fillna(0) <= 0
+
+    if explanations is not None:
+        explanations.record(
+            working.loc[no_seat & ~already_accepted, ROW_ID_COL], 1, 1, REASON_OVER_CAPACITY
+        )
+
+    open_working = working[~already_accepted & ~no_seat].reset_index(drop=True)
+    summary = {
+        "new_rows": len(new_applications),
+        "superseded_rows": changed,
+        "already_accepted_rows": int(already_accepted.sum()),
+        "no_seat_rows": int((no_seat & ~already_accepted).sum()),
+        "open_rows": len(open_working),
+    }
+    return remaining, open_working, summary
+
+
+ROUND_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    round_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    academic_year TEXT NOT NULL,
+    round_number INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS capacity_rows (
+    round_id INTEGER NOT NULL REFERENCES rounds(round_id),
+    kind TEXT NOT NULL,
+    id_code TEXT,
+    capacity_all REAL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS application_rows (
+    round_id INTEGER NOT NULL REFERENCES rounds(round_id),
+    step INTEGER NOT NULL,
+    iteration INTEGER NOT NULL,
+    row_id INTEGER,
+    cislo_uk TEXT,
+    id_code TEXT,
+    degree TEXT,
+    nominated INTEGER,
+    priority REAL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS result_rows (
+    round_id INTEGER NOT NULL REFERENCES rounds(round_id),
+    cislo_uk TEXT,
+    id_code TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_rounds_year ON rounds(academic_year, round_number);
+CREATE INDEX IF NOT EXISTS ix_capacity_round ON capacity_rows(round_id, kind);
+CREATE INDEX IF NOT EXISTS ix_capacity_id_code ON capacity_rows(id_code);
+CREATE INDEX IF NOT EXISTS ix_application_round ON application_rows(round_id, step, iteration);
+CREATE INDEX IF NOT EXISTS ix_application_id_code ON application_rows(id_code);
+CREATE INDEX IF NOT EXISTS ix_application_uk ON application_rows(cislo_uk);
+CREATE INDEX IF NOT EXISTS ix_result_round ON result_rows(round_id);
+CREATE INDEX IF NOT EXISTS ix_result_id_code ON result_rows(id_code);
+CREATE INDEX IF NOT EXISTS ix_result_uk ON result_rows(cislo_uk);
+"""
+
+# Krok 0 v histórii pracovného hárku = vstupné prihlášky daného kola
+INPUT_STEP = 0
+
+
+def rows_to_json(df: pd.DataFrame) -> list:
+    if df.empty:
+        return []
+    return df.to_json(
+        orient="records", lines=True, force_ascii=False, date_format="iso"
+    ).splitlines()
+
+
+def rows_from_json(lines: list) -> pd.DataFrame:
+    if not lines:
+        return pd.DataFrame()
+    return pd.read_json(io.StringIO("\n".join(lines)), lines=True, dtype=False)
+
+
+def key_text(value: Any) -> str:
+    # Stĺpec s prázdnou bunkou načíta Excel ako float: 10000001.0 → "10000001"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def key_as_text(series: pd.Series) -> pd.Series:
+    """Kľúč (Číslo UK, ID code) ako text, chýbajúce hodnoty ako None.
+
+    Prevod sa robí iba nad unikátnymi hodnotami, riadky sa len indexujú.
+    """
+    codes, uniques = pd.factorize(series)
+    lookup = np.array([key_text(value) for value in uniques] + [None], dtype=object)
+    return pd.Series(lookup[codes], index=series.index)
+
+
+class RoundStore:
+    """Lokálny archív kôl v súbore SQLite (bez externého servera).
+
+    Ukladá vstupy, históriu pracovného hárku a výsledky každého kola.
+    Celé riadky sú v stĺpci `data` (JSON), kľúčové polia (kolo, ID code,
+    Číslo UK) sú v samostatných indexovaných stĺpcoch pre rýchle dotazy.
+
+    Inštancia je zdieľaná všetkými reláciami (st.cache_resource), preto
+    každé volanie otvára vlastné spojenie a vlastnú transakciu.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with self.connect() as conn:
+            conn.executescript(ROUND_STORE_SCHEMA)
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Spojenie na jedno volanie; pri výnimke sa transakcia vráti späť."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start_round(self, academic_year: str, round_number: int, label: str = "") -> int:
+        with self.connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO rounds (academic_year, round_number, created_at, label) "
+                "VALUES (?, ?, ?, ?)",
+                (academic_year, round_number, datetime.now().isoformat(timespec="seconds"), label),
+            )
+        return int(cursor.lastrowid)
+
+    def save_capacities(
+        self,
+        round_id: int,
+        kind: str,
+        capacities: pd.DataFrame,
+        cap_cols: Dict[str, str],
+    ) -> None:
+        id_col = get_col(cap_cols, "ID code")
+        all_col = get_col(cap_cols, "ALL")
+        n = len(capacities)
+        records = pd.DataFrame(
+            {
+                "round_id": round_id,
+                "kind": kind,
+                "id_code": key_as_text(capacities[id_col]) if id_col else [None] * n,
+                "capacity_all": (
+                    pd.to_numeric(capacities[all_col], errors="coerce")
+                    if all_col and all_col in capacities.columns
+                    else [None] * n
+                ),
+                "data": rows_to_json(capacities),
+            }
+        )
+        with self.connect() as conn:
+            records.to_sql("capacity_rows", conn, if_exists="append", index=False)
+
+    def save_working_sheet(
+        self,
+        round_id: int,
+        step: int,
+        iteration: int,
+        working: pd.DataFrame,
+        app_cols: Dict[str, str],
+    ) -> None:
+        n = len(working)
+
+        def column(key):
+            col = get_col(app_cols, key)
+            return working[col] if col and col in working.columns else pd.Series([None] * n)
+
+        degree_raw = column("Studying for degree")
+        degree = normalize_degrees(degree_raw).fillna(
+            degree_raw.astype(str).str.strip().str.upper()
+        )
+        nominated = column("NOMINOVÁN").astype(str).str.strip().str.upper() == "ANO"
+        row_ids = working[ROW_ID_COL] if ROW_ID_COL in working.columns else [None] * n
+        records = pd.DataFrame(
+            {
+                "round_id": round_id,
+                "step": step,
+                "iteration": iteration,
+                "row_id": np.asarray(row_ids),
+                "cislo_uk": key_as_text(column("Číslo UK")).to_numpy(),
+                "id_code": key_as_text(column("ID code")).to_numpy(),
+                "degree": degree.to_numpy(),
+                "nominated": nominated.astype(int).to_numpy(),
+                "priority": pd.to_numeric(column("PRIORITA"), errors="coerce").to_numpy(),
+                "data": rows_to_json(without_row_id(working)),
+            }
+        )
+        with self.connect() as conn:
+            records.to_sql("application_rows", conn, if_exists="append", index=False)
+
+    def save_result(self, round_id: int, result: pd.DataFrame) -> None:
+        records = pd.DataFrame(
+            {
+                "round_id": round_id,
+                "cislo_uk": key_as_text(result["Číslo UK"]).to_numpy(),
+                "id_code": key_as_text(result["ID code"]).to_numpy(),
+                "data": rows_to_json(without_row_id(result)),
+            }
+        )
+        with self.connect() as conn:
+            conn.execute("DELETE FROM result_rows WHERE round_id = ?", (round_id,))
+            records.to_sql("result_rows", conn, if_exists="append", index=False)
+
+    def query(self, sql: str, params: Iterable = ()) -> pd.DataFrame:
+        with self.connect() as conn:
+            return pd.read_sql_query(sql, conn, params=tuple(params))
+
+    def load_json_rows(self, sql: str, params: Iterable = ()) -> pd.DataFrame:
+        with self.connect() as conn:
+            rows = conn.execute(sql, tuple(params)).fetchall()
+        return rows_from_json([row[0] for row in rows])
+
+    def list_rounds(self) -> pd.DataFrame:
+        return self.query(
+            "SELECT r.round_id, r.academic_year, r.round_number, r.created_at, r.label, "
+            "(SELECT COUNT(*) FROM result_rows x WHERE x.round_id = r.round_id) AS accepted "
+            "FROM rounds r ORDER BY r.academic_year DESC, r.round_number DESC, r.round_id DESC"
+        )
+
+    def load_capacities(self, round_id: int, kind: str) -> pd.DataFrame:
+        return self.load_json_rows(
+            "SELECT data FROM capacity_rows WHERE round_id = ? AND kind = ? ORDER BY rowid",
+            (round_id, kind),
+        )
+
+    def load_working_sheet(self, round_id: int, step: int, iteration: int) -> pd.DataFrame:
+        return self.load_json_rows(
+            "SELECT data FROM application_rows "
+            "WHERE round_id = ? AND step = ? AND iteration = ? ORDER BY rowid",
+            (round_id, step, iteration),
+        )
+
+    def working_sheet_history(self, round_id: int) -> pd.DataFrame:
+        return self.query(
+            "SELECT step, iteration, COUNT(*) AS rows, SUM(nominated) AS nominated "
+            "FROM application_rows WHERE round_id = ? "
+            "GROUP BY step, iteration ORDER BY MIN(rowid)",
+            (round_id,),
+        )
+
+    def load_result(self, round_id: int) -> pd.DataFrame:
+        return self.load_json_rows(
+            "SELECT data FROM result_rows WHERE round_id = ? ORDER BY rowid", (round_id,)
+        )
+
+    def partner_demand(self, years: int = 5, id_code: Optional[str] = None) -> pd.DataFrame:
+        """Dopyt po partnerských školách za posledné roky (bez čítania Excelov)."""
+        query = (
+            "WITH recent AS ("
+            "  SELECT DISTINCT academic_year FROM rounds ORDER BY academic_year DESC LIMIT ?"
+            "), apps AS ("
+            "  SELECT r.academic_year, a.id_code, COUNT(*) AS applications, "
+            "  COUNT(DISTINCT a.cislo_uk) AS students, SUM(a.nominated) AS nominated "
+            "  FROM application_rows a JOIN rounds r ON r.round_id = a.round_id "
+            "  WHERE a.step = ? AND r.academic_year IN (SELECT academic_year FROM recent) "
+            "  GROUP BY r.academic_year, a.id_code"
+            "), accepted AS ("
+            "  SELECT r.academic_year, x.id_code, COUNT(*) AS accepted "
+            "  FROM result_rows x JOIN rounds r ON r.round_id = x.round_id "
+            "  WHERE r.academic_year IN (SELECT academic_year FROM recent) "
+            "  GROUP BY r.academic_year, x.id_code"
+            ") "
+            "SELECT apps.academic_year, apps.id_code, apps.applications, apps.students, "
+            "apps.nominated, COALESCE(accepted.accepted, 0) AS accepted "
+            "FROM apps LEFT JOIN accepted "
+            "ON accepted.academic_year = apps.academic_year AND accepted.id_code = apps.id_code"
+        )
+        params: list = [years, INPUT_STEP]
+        if id_code:
+            query += " WHERE apps.id_code = ?"
+            params.append(id_code)
+        query += " ORDER BY apps.academic_year DESC, apps.applications DESC"
+        return self.query(query, params)
+
+    def student_history(self, cislo_uk: str) -> pd.DataFrame:
+        return self.query(
+            "SELECT r.academic_year, r.round_number, a.id_code, a.degree, a.priority, "
+            "EXISTS (SELECT 1 FROM result_rows x WHERE x.round_id = a.round_id "
+            "AND x.cislo_uk = a.cislo_uk AND x.id_code = a.id_code) AS accepted "
+            "FROM application_rows a JOIN rounds r ON r.round_id = a.round_id "
+            "WHERE a.cislo_uk = ? AND a.step = ? "
+            "ORDER BY r.academic_year, r.round_number, a.priority",
+            (cislo_uk, INPUT_STEP),
+        )
+
+
+def archive_path(name: str) -> str:
+    """Cesta k archívu v ARCHIVE_DIR; názov nesmie obsahovať cestu ani príponu."""
+    name = name.strip()
+    if name.endswith(".sqlite"):
+        name = name[: -len(".sqlite")]
+    if not ARCHIVE_NAME_PATTERN.fullmatch(name):
+        raise ValueError(
+            "Názov archívu môže obsahovať len písmená bez diakritiky, číslice, '-' a '_' "
+            "(najviac 64 znakov)."
+        )
+    return os.path.join(ARCHIVE_DIR, f"{name}.sqlite")
+
+
+@st.cache_resource
+def open_round_store(path: str) -> RoundStore:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return RoundStore(path)
+
+
+with st.sidebar:
+    st.divider()
+    st.subheader("Archív kôl")
+    round_store = None
+    academic_year = ""
+    if st.checkbox("Ukladať kolá do lokálneho archívu", value=False):
+        store_name = st.text_input("Názov archívu", value="nominacie_archiv")
+        academic_year = st.text_input(
+            "Akademický rok", value=f"{datetime.now().year}/{datetime.now().year + 1}"
+        )
+        try:
+            round_store = open_round_store(archive_path(store_name))
+        except ValueError as exc:
+            st.error(str(exc))
+        else:
+            st.caption(
+                "Vstupy, história pracovného hárku a výsledky sa ukladajú pre každé kolo "
+                f"do `{round_store.path}`."
+            )
+
+shared_cache = get_shared_cache()
+
+with st.sidebar:
+    st.divider()
+    st.subheader("Zdieľaná cache")
+    cache_stats = shared_cache.stats()
+    lookups = cache_stats["hits"] + cache_stats["misses"]
+    st.caption(
+        f"{cache_stats['items']} položiek, "
+        f"{cache_stats['size_bytes'] / 2**20:.1f} / {cache_stats['budget_bytes'] / 2**20:.0f} MB · "
+        f"zásahy {cache_stats['hits']}, výpadky {cache_stats['misses']}"
+        + (f" ({cache_stats['hits'] / lookups:.0%} úspešnosť)" if lookups else "")
+        + f" · vyradené {cache_stats['evictions']}"
+    )
+
+
 left, right = st.columns(2)
 
 with left:
@@ -602,8 +1624,10 @@ with right:
     )
 
 if cap_file and app_file:
-    cap_sheets = get_excel_sheets(cap_file)
-    app_sheets = get_excel_sheets(app_file)
+    cap_workbook = uploaded_workbook(shared_cache, cap_file)
+    app_workbook = uploaded_workbook(shared_cache, app_file)
+    cap_sheets = cap_workbook.sheet_names
+    app_sheets = app_workbook.sheet_names
 
     cap_sheet = None
     app_sheet = None
@@ -625,6 +1649,10 @@ if cap_file and app_file:
                 value=0,
                 step=1,
             )
+            st.caption(f"Prvých {PREVIEW_ROWS} riadkov s touto hlavičkou")
+            st.dataframe(
+                cap_workbook.preview(cap_sheet, cap_header), use_container_width=True
+            )
     with col2:
         if app_sheets:
             app_sheet = st.selectbox(
@@ -638,9 +1666,17 @@ if cap_file and app_file:
                 value=0,
                 step=1,
             )
+            st.caption(f"Prvých {PREVIEW_ROWS} riadkov s touto hlavičkou")
+            st.dataframe(
+                app_workbook.preview(app_sheet, app_header), use_container_width=True
+            )
 
-    capacities_df = read_uploaded_table(cap_file, sheet_name=cap_sheet, header_row=cap_header)
-    applications_df = read_uploaded_table(app_file, sheet_name=app_sheet, header_row=app_header)
+    cap_key, capacities_df = load_uploaded_table(
+        shared_cache, cap_workbook, sheet_name=cap_sheet, header_row=cap_header
+    )
+    app_key, applications_df = load_uploaded_table(
+        shared_cache, app_workbook, sheet_name=app_sheet, header_row=app_header
+    )
 
     st.markdown("## Náhľad načítaných tabuliek")
     preview_tab1, preview_tab2 = st.tabs([
@@ -665,9 +1701,30 @@ if cap_file and app_file:
         DEFAULT_APPLICATION_COLUMNS,
         "Prihlášky – mapovanie stĺpcov",
         "Tu systém hľadá nominácie, stupeň štúdia a ID kód univerzity.",
-        ("ID code", "Studying for degree", "NOMINOVÁN"),
+        REQUIRED_APPLICATION_KEYS,
     )
 
+    # Report závisí len od vstupov a mapovania – reruny (aj pri automatickom
+    # behu) ho berú zo zdieľanej cache
+    validation_report = shared_cache.get_or_compute(
+        content_key(
+            "validation", cap_key, app_key, sorted(cap_map.items()), sorted(app_map.items())
+        ),
+        lambda: validate_inputs(capacities_df, applications_df, cap_map, app_map),
+    )
+    validation_errors = validation_report[
+        validation_report["Závažnosť"] == VALIDATION_ERROR
+    ]
+    with st.expander(
+        f"Kontrola vstupov – {len(validation_errors)} chýb, "
+        f"{len(validation_report) - len(validation_errors)} varovaní",
+        expanded=not validation_errors.empty,
+    ):
+        if validation_report.empty:
+            st.success("Vstupné tabuľky sú v poriadku.")
+        else:
+            st.dataframe(validation_report, use_container_width=True)
+
     st.markdown("---")
 
     if "step" not in st.session_state:
@@ -675,13 +1732,63 @@ if cap_file and app_file:
         st.session_state.capacities_step1 = None
         st.session_state.working_sheet = None
         st.session_state.result_table = None
+        st.session_state.explanations = ExplanationLog()
         st.session_state.iteration = 1
+        st.session_state.round = 1
+        st.session_state.base_capacities = None
+        st.session_state.accepted_previous = None
+        st.session_state.round_applications = None
+        st.session_state.round_message = None
+        st.session_state.store_round_id = None
+        st.session_state.lineage = None
+        st.session_state.run_cap_map = None
+        st.session_state.run_app_map = None
         st.session_state.finished = False
         st.session_state.auto_run = False
 
+    # Kroky 2–6 a ďalšie kolá bežia s mapovaním uloženým v kroku 1 – na neho je
+    # viazaný kľúč lineage v zdieľanej cache
+    run_cap_map = st.session_state.run_cap_map or cap_map
+    run_app_map = st.session_state.run_app_map or app_map
+    if st.session_state.step > 1 and (run_cap_map != cap_map or run_app_map != app_map):
+        st.warning(
+            "Mapovanie stĺpcov sa zmenilo po kroku 1. Prepočet pokračuje s pôvodným "
+            "mapovaním; nové sa použije až po načítaní súborov a spustení kroku 1."
+        )
+
+    def run_engine_step(step: int, compute: Callable[[ExplanationLog], Any]) -> Any:
+        """Spustí krok cez zdieľanú cache.
+
+        Kľúč je odvodený od predchádzajúceho kroku (lineage), takže rovnaké
+        vstupy a mapovanie v inej relácii výpočet znova nespúšťajú. Dôvody
+        z kroku sa cachujú spolu s výsledkom a pripoja sa k logu relácie.
+        """
+        key = content_key(st.session_state.lineage, step, st.session_state.iteration)
+
+        def compute_with_events():
+            events = ExplanationLog()
+            return compute(events), events
+
+        value, events = shared_cache.get_or_compute(key, compute_with_events)
+        st.session_state.explanations.extend(events)
+        st.session_state.lineage = key
+        return value
+
+    def archive_working_sheet(step: int) -> None:
+        if round_store is not None and st.session_state.store_round_id is not None:
+            round_store.save_working_sheet(
+                st.session_state.store_round_id,
+                step,
+                st.session_state.iteration,
+                st.session_state.working_sheet,
+                run_app_map,
+            )
+
     step_container = st.container()
 
     with step_container:
+        if st.session_state.round_message and not st.session_state.finished:
+            st.info(st.session_state.round_message)
         if st.session_state.finished:
             st.balloons()
             st.success("🎉 Prepočet dokončený! Rozraďovanie je hotové.")
@@ -718,31 +1825,78 @@ if cap_file and app_file:
 
     if run_step:
         if st.session_state.step == 1:
-            try:
-                adjusted_capacities, nominated_rows = compute_occupancy(
+            if not validation_errors.empty:
+                st.session_state.auto_run = False
+                st.error(
+                    "Vstupné tabuľky obsahujú chyby (pozri Kontrola vstupov). "
+                    "Opravte ich pred spustením kroku 1."
+                )
+                st.stop()
+            st.session_state.explanations = ExplanationLog()
+            st.session_state.iteration = 1
+            st.session_state.lineage = content_key(
+                "run", cap_key, app_key, sorted(cap_map.items()), sorted(app_map.items())
+            )
+            st.session_state.run_cap_map = dict(cap_map)
+            st.session_state.run_app_map = dict(app_map)
+            run_cap_map = st.session_state.run_cap_map
+            run_app_map = st.session_state.run_app_map
+
+            def compute_step1(events):
+                adjusted, _, unmatched = compute_occupancy(
                     capacities_df, applications_df, cap_map, app_map
                 )
+                return adjusted, unmatched, init_working_sheet(applications_df)
+
+            try:
+                adjusted_capacities, unmatched, working = run_engine_step(1, compute_step1)
             except ValueError as exc:
                 st.error(str(exc))
                 st.stop()
 
             st.session_state.capacities_step1 = adjusted_capacities
-            st.session_state.working_sheet = applications_df.copy()
+            st.session_state.working_sheet = working
+            st.session_state.round = 1
+            # Ďalšie kolá rátajú voľné miesta z ponuky v hárku 1, nie z obsadenosti
+            st.session_state.base_capacities = capacities_df
+            st.session_state.accepted_previous = None
+            st.session_state.round_applications = None
+            st.session_state.round_message = None
             st.session_state.step = 2
 
+            st.session_state.store_round_id = None
+            if round_store is not None:
+                round_id = round_store.start_round(academic_year, 1)
+                round_store.save_capacities(round_id, "input", capacities_df, cap_map)
+                round_store.save_capacities(round_id, "adjusted", adjusted_capacities, cap_map)
+                st.session_state.store_round_id = round_id
+                archive_working_sheet(INPUT_STEP)
+
             st.success("Krok 1 hotový. Kapacity boli upravené podľa reálnych nominácií.")
+            if unmatched["degree"] or unmatched["id_code"]:
+                st.warning(
+                    f"Nominované riadky mimo obsadenosti: {unmatched['degree']} s neznámym "
+                    f"stupňom štúdia (započítané iba do ALL), {unmatched['id_code']} s ID code "
+                    "bez riadku v kapacitách."
+                )
             if st.session_state.auto_run:
                 st.rerun()
         elif st.session_state.step == 2:
             try:
-                st.session_state.working_sheet = filter_duplicates_by_priority(
-                    st.session_state.working_sheet,
-                    app_map,
+                st.session_state.working_sheet = run_engine_step(
+                    2,
+                    lambda events: filter_duplicates_by_priority(
+                        st.session_state.working_sheet,
+                        run_app_map,
+                        explanations=events,
+                        iteration=st.session_state.iteration,
+                    ),
                 )
             except ValueError as exc:
                 st.error(str(exc))
                 st.stop()
 
+            archive_working_sheet(2)
             st.session_state.step = 3
             st.success(
                 "Krok 2 hotový. Duplicity v pracovnom hárku boli odfiltrované podľa priority."
@@ -751,14 +1905,18 @@ if cap_file and app_file:
                 st.rerun()
         elif st.session_state.step == 3:
             try:
-                st.session_state.working_sheet = normalize_ordering_by_id_code(
-                    st.session_state.working_sheet,
-                    app_map,
+                st.session_state.working_sheet = run_engine_step(
+                    3,
+                    lambda events: normalize_ordering_by_id_code(
+                        st.session_state.working_sheet,
+                        run_app_map,
+                    ),
                 )
             except ValueError as exc:
                 st.error(str(exc))
                 st.stop()
 
+            archive_working_sheet(3)
             st.session_state.step = 4
             st.success(
                 "Krok 3 hotový. Poradie bolo prečíslované pre každé ID code."
@@ -767,11 +1925,17 @@ if cap_file and app_file:
                 st.rerun()
         elif st.session_state.step == 4:
             try:
-                st.session_state.result_table = build_result_table(
-                    st.session_state.working_sheet,
-                    st.session_state.capacities_step1,
-                    cap_map,
-                    app_map,
+                st.session_state.result_table = run_engine_step(
+                    4,
+                    lambda events: build_result_table(
+                        st.session_state.working_sheet,
+                        st.session_state.capacities_step1,
+                        run_cap_map,
+                        run_app_map,
+                        explanations=events,
+                        iteration=st.session_state.iteration,
+                        round_number=st.session_state.round,
+                    ),
                 )
             except ValueError as exc:
                 st.error(str(exc))
@@ -788,15 +1952,19 @@ if cap_file and app_file:
                 (
                     st.session_state.working_sheet,
                     st.session_state.result_table,
-                ) = update_nominations(
-                    st.session_state.working_sheet,
-                    st.session_state.result_table,
-                    app_map,
+                ) = run_engine_step(
+                    5,
+                    lambda events: update_nominations(
+                        st.session_state.working_sheet,
+                        st.session_state.result_table,
+                        run_app_map,
+                    ),
                 )
             except ValueError as exc:
                 st.error(str(exc))
                 st.stop()
 
+            archive_working_sheet(5)
             st.session_state.step = 6
             st.success(
                 "Krok 5 hotový. Nominácie boli aktualizované podľa prijatých študentov."
@@ -806,16 +1974,22 @@ if cap_file and app_file:
         else:
             rows_before = len(st.session_state.working_sheet)
             try:
-                st.session_state.working_sheet = resolve_duplicate_cycles(
-                    st.session_state.working_sheet,
-                    st.session_state.capacities_step1,
-                    cap_map,
-                    app_map,
+                st.session_state.working_sheet = run_engine_step(
+                    6,
+                    lambda events: resolve_duplicate_cycles(
+                        st.session_state.working_sheet,
+                        st.session_state.capacities_step1,
+                        run_cap_map,
+                        run_app_map,
+                        explanations=events,
+                        iteration=st.session_state.iteration,
+                    ),
                 )
             except ValueError as exc:
                 st.error(str(exc))
                 st.stop()
 
+            archive_working_sheet(6)
             rows_after = len(st.session_state.working_sheet)
             changes_made = rows_before != rows_after
 
@@ -829,16 +2003,148 @@ if cap_file and app_file:
                     st.rerun()
             else:
                 st.session_state.finished = True
+                if round_store is not None and st.session_state.store_round_id is not None:
+                    round_store.save_result(
+                        st.session_state.store_round_id,
+                        apply_explanations(
+                            st.session_state.result_table, st.session_state.explanations
+                        ),
+                    )
+                st.rerun()
+
+    if st.session_state.finished and st.session_state.result_table is not None:
+        next_round = st.session_state.round + 1
+        st.markdown(f"## Rozraďovacie kolo {next_round}")
+        st.caption(
+            "Nahrajte iba nové alebo zmenené prihlášky. Prijatí študenti z predchádzajúcich "
+            "kôl si miesto ponechajú a výpočet prebehne len nad voľnými miestami."
+        )
+        late_file = st.file_uploader(
+            "Nové / zmenené prihlášky (Excel alebo CSV)",
+            type=["xlsx", "xls", "csv"],
+            key=f"late_file_{next_round}",
+        )
+        if late_file:
+            late_workbook = uploaded_workbook(shared_cache, late_file)
+            late_sheets = late_workbook.sheet_names
+            late_sheet = None
+            if late_sheets:
+                late_sheet = st.selectbox(
+                    "Nové prihlášky – vyber hárok",
+                    options=late_sheets,
+                    index=0,
+                    key=f"late_sheet_{next_round}",
+                )
+            late_header = st.number_input(
+                "Nové prihlášky – riadok hlavičky (0 = prvý riadok)",
+                min_value=0,
+                value=0,
+                step=1,
+                key=f"late_header_{next_round}",
+            )
+            st.caption(f"Prvých {PREVIEW_ROWS} riadkov s touto hlavičkou")
+            st.dataframe(
+                late_workbook.preview(late_sheet, late_header), use_container_width=True
+            )
+            if st.button(f"Spustiť kolo {next_round}", type="primary"):
+                late_key, late_df = load_uploaded_table(
+                    shared_cache, late_workbook, sheet_name=late_sheet, header_row=late_header
+                )
+                late_report = shared_cache.get_or_compute(
+                    content_key(
+                        "validation",
+                        cap_key,
+                        late_key,
+                        sorted(run_cap_map.items()),
+                        sorted(run_app_map.items()),
+                    ),
+                    lambda: validate_inputs(capacities_df, late_df, run_cap_map, run_app_map),
+                )
+                late_errors = late_report[late_report["Závažnosť"] == VALIDATION_ERROR]
+                if not late_errors.empty:
+                    st.error(
+                        f"Nové prihlášky obsahujú chyby ({len(late_errors)}). "
+                        "Opravte ich pred spustením ďalšieho kola."
+                    )
+                    st.dataframe(late_report, use_container_width=True)
+                    st.stop()
+                round_accepted = apply_explanations(
+                    st.session_state.result_table, st.session_state.explanations
+                )
+                if st.session_state.accepted_previous is not None:
+                    accepted_all = pd.concat(
+                        [st.session_state.accepted_previous, round_accepted],
+                        ignore_index=True,
+                    )
+                else:
+                    accepted_all = round_accepted
+
+                explanations = ExplanationLog()
+                try:
+                    remaining, open_working, summary = prepare_next_round(
+                        st.session_state.base_capacities,
+                        accepted_all,
+                        late_df,
+                        run_cap_map,
+                        run_app_map,
+                        explanations=explanations,
+                    )
+                except ValueError as exc:
+                    st.error(str(exc))
+                    st.stop()
+
+                if open_working.empty:
+                    st.warning(
+                        "V nových prihláškach nie sú žiadne riadky pre voľné miesta "
+                        "a neprijatých študentov."
+                    )
+                    st.stop()
+
+                st.session_state.capacities_step1 = remaining
+                st.session_state.working_sheet = open_working
+                st.session_state.result_table = None
+                st.session_state.accepted_previous = accepted_all
+                st.session_state.round_applications = late_df
+                st.session_state.explanations = explanations
+                st.session_state.round = next_round
+                st.session_state.lineage = content_key(
+                    st.session_state.lineage, "round", next_round, late_key
+                )
+                st.session_state.iteration = 1
+                st.session_state.auto_run = False
+                st.session_state.finished = False
+                st.session_state.step = 2
+                st.session_state.store_round_id = None
+                if round_store is not None:
+                    round_id = round_store.start_round(academic_year, next_round)
+                    round_store.save_capacities(round_id, "adjusted", remaining, run_cap_map)
+                    round_store.save_working_sheet(
+                        round_id, INPUT_STEP, 1, init_working_sheet(late_df), run_app_map
+                    )
+                    st.session_state.store_round_id = round_id
+                st.session_state.round_message = (
+                    f"Kolo {next_round}: {summary['new_rows']} nových riadkov, "
+                    f"{summary['superseded_rows']} nahradených, "
+                    f"{summary['already_accepted_rows']} od už prijatých študentov, "
+                    f"{summary['no_seat_rows']} na školy bez voľného miesta. "
+                    f"Do výpočtu ide {summary['open_rows']} riadkov."
+                    + (
+                        f" Kontrola vstupov: {len(late_report)} varovaní."
+                        if not late_report.empty
+                        else ""
+                    )
+                )
                 st.rerun()
 
     if st.session_state.capacities_step1 is not None:
         st.markdown("## Výstupy – prehľad hárkov")
-        out_tab1, out_tab2, out_tab3, out_tab4, out_tab5 = st.tabs([
+        out_tab1, out_tab2, out_tab3, out_tab4, out_tab5, out_tab6 = st.tabs([
             "Hárok 1 – Kapacity (vstup)",
             "Hárok 2 – Kapacity po úprave",
             "Hárok 3 – Prihlášky (vstup)",
             "Hárok 4 – Pracovná tabuľka",
             "Hárok 5 – Výsledná tabuľka",
+            "Dôvody rozhodnutí",
         ])
         with out_tab1:
             st.dataframe(capacities_df, use_container_width=True)
@@ -847,11 +2153,97 @@ if cap_file and app_file:
         with out_tab3:
             st.dataframe(applications_df, use_container_width=True)
         with out_tab4:
-            st.dataframe(st.session_state.working_sheet, use_container_width=True)
+            st.dataframe(
+                without_row_id(st.session_state.working_sheet), use_container_width=True
+            )
         with out_tab5:
             if st.session_state.result_table is None:
                 st.info("Výstupná tabuľka bude doplnená v ďalších krokoch analýzy.")
             else:
-                st.dataframe(st.session_state.result_table, use_container_width=True)
+                round_result = apply_explanations(
+                    st.session_state.result_table, st.session_state.explanations
+                )
+                if st.session_state.accepted_previous is not None:
+                    round_result = pd.concat(
+                        [st.session_state.accepted_previous, round_result],
+                        ignore_index=True,
+                    )
+                st.dataframe(round_result, use_container_width=True)
+        with out_tab6:
+            st.caption(
+                "Posledný dôvod zaznamenaný pre každú prihlášku (filter priority, "
+                "kapacita, cykly duplicít)."
+            )
+            round_input = st.session_state.round_applications
+            if round_input is None:
+                round_input = applications_df
+            st.dataframe(
+                apply_explanations(
+                    round_input,
+                    st.session_state.explanations,
+                    row_ids=pd.Series(np.arange(len(round_input))),
+                ),
+                use_container_width=True,
+            )
 else:
     st.info("Nahrajte obe tabuľky, aby bolo možné spustiť krok 1.")
+
+if round_store is not None:
+    st.markdown("## Archív kôl")
+    archived_rounds = round_store.list_rounds()
+    if archived_rounds.empty:
+        st.info("Archív je zatiaľ prázdny.")
+    else:
+        arch_tab1, arch_tab2, arch_tab3 = st.tabs([
+            "Uložené kolá",
+            "Dopyt po partnerských školách",
+            "História študenta",
+        ])
+        with arch_tab1:
+            st.dataframe(archived_rounds, use_container_width=True)
+            archived_id = st.selectbox(
+                "Zobraziť kolo",
+                options=archived_rounds["round_id"].tolist(),
+                format_func=lambda round_id: "{academic_year} – kolo {round_number}".format(
+                    **archived_rounds.set_index("round_id").loc[round_id]
+                ),
+            )
+            history = round_store.working_sheet_history(archived_id)
+            st.caption("História pracovného hárku (krok 0 = vstupné prihlášky).")
+            st.dataframe(history, use_container_width=True)
+            view = st.radio(
+                "Hárok",
+                ["Výsledná tabuľka", "Kapacity po úprave", "Pracovný hárok"],
+                horizontal=True,
+            )
+            if view == "Výsledná tabuľka":
+                st.dataframe(round_store.load_result(archived_id), use_container_width=True)
+            elif view == "Kapacity po úprave":
+                st.dataframe(
+                    round_store.load_capacities(archived_id, "adjusted"),
+                    use_container_width=True,
+                )
+            elif not history.empty:
+                snapshot = st.selectbox(
+                    "Krok / iterácia",
+                    options=list(history[["step", "iteration"]].itertuples(index=False, name=None)),
+                    format_func=lambda key: f"krok {key[0]}, iterácia {key[1]}",
+                )
+                st.dataframe(
+                    round_store.load_working_sheet(archived_id, *snapshot),
+                    use_container_width=True,
+                )
+        with arch_tab2:
+            years = st.number_input("Počet posledných rokov", min_value=1, value=5, step=1)
+            demand_code = st.text_input("ID code (prázdne = všetky školy)", value="")
+            st.dataframe(
+                round_store.partner_demand(years=int(years), id_code=demand_code.strip() or None),
+                use_container_width=True,
+            )
+        with arch_tab3:
+            student_uk = st.text_input("Číslo UK", value="")
+            if student_uk.strip():
+                st.dataframe(
+                    round_store.student_history(student_uk.strip()),
+                    use_container_width=True,
+                )
@@ -0,0 +1,143 @@
+"""Kontrola, že WorkbookHandle v app.py číta XLSX rovnako ako pd.read_excel.
+
+WorkbookHandle skladá DataFrame z buniek openpyxl a pandas TextParser
+(excel_cell_value, trim_rows, rows_to_frame) – napodobňuje tak interné
+správanie pandas pri čítaní cez openpyxl. Po zmene verzie pandas alebo
+openpyxl (requirements.txt) treba skript spustiť; pri rozdiele skončí s kódom 1.
+
+    python harness/check_workbook_reader.py
+    python harness/check_workbook_reader.py kapacity.xlsx prihlasky.xlsx --headers 3
+
+Bez argumentov sa porovná vygenerovaný zošit s okrajovými prípadmi (prázdne
+riadky a stĺpce, chybová bunka, dátumy, zmiešané typy, duplicitné hlavičky).
+Pre každý hárok a riadok hlavičky sa porovná celé čítanie aj náhľad.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import os
+import sys
+from typing import List
+
+import openpyxl
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app.py volá Streamlit už pri importe; varovania bare mode idú do prázdna
+sys.path.insert(0, ROOT)
+with contextlib.redirect_stderr(io.StringIO()):
+    import app  # noqa: E402
+
+PREVIEW_SIZES = (0, 1, 3, app.PREVIEW_ROWS)
+
+
+def sample_workbook() -> bytes:
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Kapacity"
+    sheet.append(["Titulok"])
+    sheet.append([])
+    sheet.append(["ID code", "BC", None, "BC", "Dátum", "Text", "Mix"])
+    for i in range(50):
+        sheet.append([
+            f"S{i}",
+            i,
+            1.5 * i,
+            None if i % 7 == 0 else i,
+            datetime.datetime(2024, 1, 1 + i % 28),
+            "NA" if i % 5 == 0 else f"t{i}",
+            i if i % 2 else "x",
+        ])
+    sheet["B10"] = "=1/0"
+    sheet.append([])
+    sheet.append([None, None])
+    workbook.create_sheet("Prázdny")
+    applications = workbook.create_sheet("Prihlášky")
+    for i in range(30):
+        applications.append([i, f"n{i}", 2.0])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def outcome(read):
+    """DataFrame alebo názov výnimky – obe strany musia zlyhať rovnako."""
+    try:
+        return read()
+    except Exception as exc:  # noqa: BLE001
+        return type(exc).__name__
+
+
+def compare(expected, got) -> str:
+    if isinstance(expected, str) or isinstance(got, str):
+        return "" if expected == got else f"{expected} != {got}"
+    try:
+        assert_frame_equal(got, expected)
+    except AssertionError as exc:
+        return str(exc).splitlines()[0]
+    return ""
+
+
+def check_workbook(name: str, data: bytes, headers: int) -> List[str]:
+    failures = []
+    handle = app.WorkbookHandle(name, "check", data)
+    for sheet in handle.sheet_names:
+        for header in range(headers):
+            # Náhľad ide raz zo studeného handle (streamuje začiatok hárku)
+            # a raz z riadkov podržaných po celom čítaní
+            cold = app.WorkbookHandle(name, "check", data)
+            cases = [
+                (
+                    "read",
+                    lambda: pd.read_excel(io.BytesIO(data), sheet_name=sheet, header=header),
+                    lambda: handle.read(sheet, header),
+                )
+            ]
+            for nrows in PREVIEW_SIZES:
+                expected = lambda nrows=nrows: pd.read_excel(  # noqa: E731
+                    io.BytesIO(data), sheet_name=sheet, header=header, nrows=nrows
+                )
+                cases.append((f"preview {nrows}", expected,
+                              lambda nrows=nrows: cold.preview(sheet, header, nrows)))
+                cases.append((f"preview {nrows} (riadky v pamäti)", expected,
+                              lambda nrows=nrows: handle.preview(sheet, header, nrows)))
+            for label, expected, got in cases:
+                problem = compare(outcome(expected), outcome(got))
+                if problem:
+                    failures.append(f"{name} / {sheet} / hlavička {header} / {label}: {problem}")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="XLSX súbory (bez nich vygenerovaný zošit)")
+    parser.add_argument("--headers", type=int, default=4,
+                        help="počet skúšaných riadkov hlavičky (0 až N-1)")
+    args = parser.parse_args(argv)
+
+    print(f"pandas {pd.__version__}, openpyxl {openpyxl.__version__}")
+    workbooks = [("vzorka.xlsx", sample_workbook())]
+    if args.files:
+        workbooks = []
+        for path in args.files:
+            with open(path, "rb") as handle:
+                workbooks.append((os.path.basename(path), handle.read()))
+
+    failures = []
+    for name, data in workbooks:
+        failures.extend(check_workbook(name, data, args.headers))
+    for failure in failures:
+        print(failure)
+    if failures:
+        print(f"WorkbookHandle sa líši od pd.read_excel ({len(failures)} prípadov)")
+        return 1
+    print("WorkbookHandle číta rovnako ako pd.read_excel")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
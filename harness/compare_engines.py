@@ -0,0 +1,378 @@
+"""Porovnanie enginov app.py a web-app/src/logic/allSteps.ts na spoločných fixtures.
+
+Vygeneruje kapacity a prihlášky (deterministicky podľa seedu), prevedie ich
+krokmi 1–6 v oboch enginoch a po každom kroku a iterácii porovná tabuľky.
+Nakoniec vypíše časy krokov oboch enginov. Pri rozdiele skončí s kódom 1.
+
+    python harness/compare_engines.py --students 2000 --schools 150 --seed 7
+    python harness/compare_engines.py --fixtures harness/golden --repeat 5
+
+TS kroky beží Node ≥ 22.6 s --experimental-strip-types (allSteps.ts sa
+importuje priamo, bez buildu). Cestu k node možno zadať cez --node; verzia
+sa overí ešte pred výpočtom v app.py.
+
+Porovnávajú sa iba stĺpce, s ktorými pracujú oba enginy, normalizované tak,
+ako ich kroky čítajú (NOMINOVÁN strip/upper, čísla ako float). Pomocné
+stĺpce app.py (_row_id, dôvody, výstupné stĺpce kroku 4) sa ignorujú a
+poradie riadkov sa neporovnáva. Časť fixtures má prázdne Pořadí; oba enginy
+ich majú radiť za všetky čísla.
+
+Krok 6 v app.py hľadá cykly cez množiny s ID code (reťazce), takže jeho
+výsledok závisí od hash seedu procesu. Ak PYTHONHASHSEED nie je nastavený,
+skript sa sám spustí znova s PYTHONHASHSEED=0; iný seed sa dá zadať
+explicitne, napr. PYTHONHASHSEED=3 python harness/compare_engines.py.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+# Pevný hash seed musí platiť od štartu interpretera, preto nový proces
+if __name__ == "__main__" and "PYTHONHASHSEED" not in os.environ:
+    os.execve(
+        sys.executable,
+        [sys.executable, os.path.abspath(__file__), *sys.argv[1:]],
+        {**os.environ, "PYTHONHASHSEED": "0"},
+    )
+
+import pandas as pd  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TS_RUNNER = os.path.join(ROOT, "harness", "run_allsteps.mjs")
+
+# app.py volá Streamlit už pri importe; varovania bare mode (a logger Streamlitu,
+# ktorý si stderr uloží pri importe) idú do prázdna
+sys.path.insert(0, ROOT)
+with contextlib.redirect_stderr(io.StringIO()):
+    import app  # noqa: E402
+
+# groupby.apply v krokoch 2 a 3 na pandas 2.x varuje pri každej iterácii
+warnings.filterwarnings("ignore", category=FutureWarning, module="app")
+
+CAP_COLS = app.DEFAULT_CAPACITY_COLUMNS
+APP_COLS = app.DEFAULT_APPLICATION_COLUMNS
+
+DEGREE_VALUES = ["BC", "MGR", "PHD", "BSc", "master", " Mgr ", "Dr", "Erasmus+"]
+NOMINATED_VALUES = ["ANO", "ANO", "ANO", " ano", "Ano "]
+BLANK_ORDER_SHARE = 0.1
+
+# --experimental-strip-types (import allSteps.ts bez buildu) má Node od 22.6
+MIN_NODE_VERSION = (22, 6)
+
+# Porovnávané stĺpce každej tabuľky: (stĺpec, typ)
+COMPARED_COLUMNS = {
+    "capAdj": [("ID code", "text"), ("BC", "number"), ("MGR", "number"),
+               ("PHD", "number"), ("ALL", "number")],
+    "working": [("Číslo UK", "text"), ("ID code", "text"), ("NOMINOVÁN", "flag"),
+                ("PRIORITA", "number"), ("Pořadí", "number")],
+    "result": [("Číslo UK", "text"), ("ID code", "text"), ("Pořadí", "number")],
+}
+
+STEP_LABELS = {
+    1: "obsadenosť",
+    2: "filter priorít",
+    3: "prečíslovanie",
+    4: "výber podľa kapacít",
+    5: "nominácie",
+    6: "cykly duplicít",
+}
+
+
+# ─── Fixtures ───────────────────────────────────────────────────────
+
+def generate_fixtures(students: int, schools: int, seed: int) -> Tuple[list, list]:
+    """Kapacity a prihlášky so stupňami, prioritami, poradím a nomináciami."""
+    rng = random.Random(seed)
+    codes = [f"S{index:04d}" for index in range(schools)]
+
+    capacities = []
+    for code in codes:
+        bc, mgr, phd = rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 1)
+        capacities.append({
+            "ID code": code,
+            "University Name": f"University {code}",
+            "BC": bc,
+            "MGR": mgr,
+            "PHD": phd,
+            "ALL": bc + mgr + phd,
+        })
+
+    applications = []
+    applicants: Dict[str, list] = {code: [] for code in codes}
+    for student in range(students):
+        uk = 10_000_000 + student
+        degree = rng.choice(DEGREE_VALUES)
+        chosen = rng.sample(codes, k=min(len(codes), rng.randint(1, 4)))
+        nominated = rng.randrange(len(chosen)) if rng.random() < 0.7 else None
+        for priority, code in enumerate(chosen, start=1):
+            row = {
+                "Číslo UK": uk,
+                "Číslo přihlášky": f"P{student:06d}-{priority}",
+                "ID code": code,
+                "Studying for degree": degree,
+                "PRIORITA": priority,
+                "Pořadí": None,
+                "NOMINOVÁN": (
+                    rng.choice(NOMINATED_VALUES) if priority - 1 == nominated else "NE"
+                ),
+                "PRŮMĚR": round(rng.uniform(1.0, 3.5), 2),
+            }
+            applications.append(row)
+            applicants[code].append(row)
+
+    # Pořadí je v rámci školy permutácia 1..n (bez remíz, stabilné v oboch enginoch),
+    # asi desatina prihlášok ho nemá vyplnené
+    for rows in applicants.values():
+        for order, row in enumerate(rng.sample(rows, k=len(rows)), start=1):
+            row["Pořadí"] = None if rng.random() < BLANK_ORDER_SHARE else order
+
+    return capacities, applications
+
+
+def write_fixtures(directory: str, capacities: list, applications: list) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for name, rows in (("capacities.json", capacities), ("applications.json", applications)):
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as handle:
+            json.dump(rows, handle, ensure_ascii=False)
+
+
+def read_fixtures(directory: str) -> Tuple[list, list]:
+    tables = []
+    for name in ("capacities.json", "applications.json"):
+        with open(os.path.join(directory, name), encoding="utf-8") as handle:
+            tables.append(json.load(handle))
+    return tables[0], tables[1]
+
+
+# ─── Enginy ─────────────────────────────────────────────────────────
+
+def timed(compute: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    value = compute()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def python_pipeline(capacities: pd.DataFrame, applications: pd.DataFrame) -> List[dict]:
+    """Kroky 1–6 z app.py v rovnakom poradí ako UI (krok 6 → krok 3)."""
+    snapshots = []
+
+    def record(step, iteration, ms, **tables):
+        snapshots.append({"step": step, "iteration": iteration, "ms": ms, "tables": tables})
+
+    (adjusted, working), ms = timed(lambda: (
+        app.compute_occupancy(capacities, applications, CAP_COLS, APP_COLS)[0],
+        app.init_working_sheet(applications),
+    ))
+    record(1, 1, ms, capAdj=adjusted, working=working)
+
+    working, ms = timed(lambda: app.filter_duplicates_by_priority(working, APP_COLS))
+    record(2, 1, ms, working=working)
+
+    iteration = 1
+    while True:
+        working, ms = timed(lambda: app.normalize_ordering_by_id_code(working, APP_COLS))
+        record(3, iteration, ms, working=working)
+
+        result, ms = timed(lambda: app.build_result_table(
+            working, adjusted, CAP_COLS, APP_COLS, iteration=iteration
+        ))
+        record(4, iteration, ms, result=result)
+
+        (working, result), ms = timed(lambda: app.update_nominations(working, result, APP_COLS))
+        record(5, iteration, ms, working=working, result=result)
+
+        rows_before = len(working)
+        working, ms = timed(lambda: app.resolve_duplicate_cycles(
+            working, adjusted, CAP_COLS, APP_COLS, iteration=iteration
+        ))
+        record(6, iteration, ms, working=working)
+        if len(working) == rows_before:
+            return snapshots
+        iteration += 1
+
+
+def run_python(capacities: list, applications: list, repeat: int) -> List[dict]:
+    capacities_df = pd.DataFrame(capacities)
+    applications_df = pd.DataFrame(applications)
+    snapshots = python_pipeline(capacities_df, applications_df)
+    for _ in range(repeat - 1):
+        again = python_pipeline(capacities_df, applications_df)
+        for snapshot, other in zip(snapshots, again):
+            snapshot["ms"] = min(snapshot["ms"], other["ms"])
+    for snapshot in snapshots:
+        snapshot["tables"] = {
+            name: df.to_dict("records") for name, df in snapshot["tables"].items()
+        }
+    return snapshots
+
+
+def check_node(node: str) -> str:
+    """Overí verziu Node skôr, než sa spustí (pomalší) výpočet v app.py."""
+    try:
+        completed = subprocess.run([node, "--version"], capture_output=True, text=True, check=False)
+    except FileNotFoundError:
+        raise SystemExit(f"Node sa nenašiel ({node}). Zadaj cestu cez --node.")
+    version = completed.stdout.strip()
+    try:
+        parsed = tuple(int(part) for part in version.lstrip("v").split(".")[:2])
+    except ValueError:
+        raise SystemExit(f"Neznáma verzia Node ({node}): {version or completed.stderr.strip()}")
+    if parsed < MIN_NODE_VERSION:
+        required = ".".join(map(str, MIN_NODE_VERSION))
+        raise SystemExit(
+            f"TS engine potrebuje Node ≥ {required} (--experimental-strip-types), "
+            f"{node} je {version}. Zadaj inú cestu cez --node."
+        )
+    return version
+
+
+def run_typescript(fixture_dir: str, repeat: int, node: str) -> Tuple[List[dict], str]:
+    command = [node, "--experimental-strip-types", "--no-warnings", TS_RUNNER, fixture_dir, str(repeat)]
+    completed = subprocess.run(command, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise SystemExit("TS engine zlyhal:\n" + completed.stderr.strip())
+    output = json.loads(completed.stdout)
+    return output["snapshots"], output["node"]
+
+
+# ─── Porovnanie ─────────────────────────────────────────────────────
+
+def canonical(value: Any, kind: str) -> Any:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None if kind == "number" else ""
+    if kind == "number":
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if math.isnan(number) else number
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text.upper() if kind == "flag" else text
+
+
+def canonical_rows(table: str, rows: list) -> Counter:
+    columns = COMPARED_COLUMNS[table]
+    return Counter(
+        tuple(canonical(row.get(column), kind) for column, kind in columns) for row in rows
+    )
+
+
+def compare_snapshots(python: List[dict], typescript: List[dict], limit: int = 5) -> List[str]:
+    """Rozdiely ako riadky reportu (prázdny zoznam = zhoda).
+
+    Podrobne sa vypíše iba prvá rozchádzajúca sa snímka, ďalšie kroky z nej
+    väčšinou len vyplývajú.
+    """
+    problems = []
+    for py, ts in zip(python, typescript):
+        if (py["step"], py["iteration"]) != (ts["step"], ts["iteration"]):
+            problems.append(
+                f"poradie krokov sa rozchádza: app.py krok {py['step']}/{py['iteration']}, "
+                f"allSteps.ts krok {ts['step']}/{ts['iteration']}"
+            )
+            break
+        for table in py["tables"]:
+            expected = canonical_rows(table, py["tables"][table])
+            actual = canonical_rows(table, ts["tables"].get(table, []))
+            if expected == actual:
+                continue
+            only_py = list((expected - actual).elements())
+            only_ts = list((actual - expected).elements())
+            columns = [column for column, _ in COMPARED_COLUMNS[table]]
+            problems.append(
+                f"prvý rozdiel: krok {py['step']} (iterácia {py['iteration']}), {table}: "
+                f"{sum(expected.values())} vs {sum(actual.values())} riadkov, "
+                f"{len(only_py)} iba v app.py, {len(only_ts)} iba v allSteps.ts"
+            )
+            problems.append(f"    stĺpce:      {columns}")
+            problems.extend(f"    app.py:      {row}" for row in sorted(only_py)[:limit])
+            problems.extend(f"    allSteps.ts: {row}" for row in sorted(only_ts)[:limit])
+        if problems:
+            break
+
+    iterations = [max(s["iteration"] for s in snapshots) for snapshots in (python, typescript)]
+    if iterations[0] != iterations[1]:
+        problems.append(
+            f"počet iterácií: app.py {iterations[0]}, allSteps.ts {iterations[1]}"
+        )
+    return problems
+
+
+def timing_report(python: List[dict], typescript: List[dict]) -> str:
+    lines = [f"{'krok':<28} {'iter':>4} {'riadky':>7} {'app.py ms':>10} {'TS ms':>10} {'pomer':>7}"]
+    totals = [0.0, 0.0]
+    for py, ts in zip(python, typescript):
+        rows = len(py["tables"].get("working", py["tables"].get("result", [])))
+        ratio = py["ms"] / ts["ms"] if ts["ms"] > 0 else float("inf")
+        label = f"{py['step']} {STEP_LABELS[py['step']]}"
+        lines.append(
+            f"{label:<28} {py['iteration']:>4} {rows:>7} {py['ms']:>10.2f} {ts['ms']:>10.2f} {ratio:>6.1f}x"
+        )
+        totals[0] += py["ms"]
+        totals[1] += ts["ms"]
+    lines.append(f"{'spolu':<28} {'':>4} {'':>7} {totals[0]:>10.2f} {totals[1]:>10.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--schools", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--fixtures",
+        help="adresár fixtures; ak existuje, použije sa, inak sa doň vygenerujú",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="časy = minimum z N behov")
+    parser.add_argument("--node", default=os.environ.get("NODE", "node"))
+    parser.add_argument("--json", help="uloží snímky a časy oboch enginov do súboru")
+    args = parser.parse_args(argv)
+    check_node(args.node)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        fixture_dir = args.fixtures or scratch
+        if os.path.exists(os.path.join(fixture_dir, "applications.json")):
+            capacities, applications = read_fixtures(fixture_dir)
+        else:
+            capacities, applications = generate_fixtures(args.students, args.schools, args.seed)
+            write_fixtures(fixture_dir, capacities, applications)
+
+        repeat = max(1, args.repeat)
+        python = run_python(capacities, applications, repeat)
+        typescript, node_version = run_typescript(fixture_dir, repeat, args.node)
+
+    print(
+        f"Fixtures: {len(capacities)} kapacít, {len(applications)} prihlášok; "
+        f"pandas {pd.__version__}, Node {node_version}, "
+        f"PYTHONHASHSEED={os.environ.get('PYTHONHASHSEED')}"
+    )
+    print(timing_report(python, typescript))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump({"app.py": python, "allSteps.ts": typescript}, handle, ensure_ascii=False, default=str)
+
+    problems = compare_snapshots(python, typescript)
+    if problems:
+        print(f"\nEnginy sa rozchádzajú (PYTHONHASHSEED={os.environ.get('PYTHONHASHSEED')}):")
+        print("\n".join(problems))
+        return 1
+    print("\nVýsledky oboch enginov sa zhodujú po každom kroku a iterácii.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+// Spustí kroky 1–6 z web-app/src/logic/allSteps.ts nad fixture z compare_engines.py.
+//
+// Použitie: node --experimental-strip-types run_allsteps.mjs <fixture_dir> [repeat]
+// Na stdout vypíše JSON so snímkami tabuliek po každom kroku a iterácii
+// a s časmi krokov v ms (minimum z `repeat` behov).
+import { readFileSync } from 'node:fs';
+import { join } from 'node:path';
+import { performance } from 'node:perf_hooks';
+import {
+    DEFAULT_CAP_COLS, DEFAULT_APP_COLS,
+    step1_computeOccupancy,
+    step2_filterDuplicates,
+    step3_normalizeOrdering,
+    step4_buildResultTable,
+    step5_updateNominations,
+    step6_resolveCycles,
+} from '../web-app/src/logic/allSteps.ts';
+
+const [fixtureDir, repeatArg] = process.argv.slice(2);
+const repeat = Math.max(1, Number(repeatArg) || 1);
+const capRows = JSON.parse(readFileSync(join(fixtureDir, 'capacities.json'), 'utf8'));
+const appRows = JSON.parse(readFileSync(join(fixtureDir, 'applications.json'), 'utf8'));
+
+function timed(fn) {
+    const start = performance.now();
+    const value = fn();
+    return [value, performance.now() - start];
+}
+
+// Rovnaké poradie krokov ako runAll v engine.worker.ts
+function pipeline() {
+    const snapshots = [];
+    // step3 prečísluje Pořadí priamo v riadkoch, snímka preto musí byť kópia
+    const record = (step, iteration, ms, tables) =>
+        snapshots.push({ step, iteration, ms, tables: structuredClone(tables) });
+
+    let [[capAdj, working], ms] = timed(() => [
+        step1_computeOccupancy(capRows, appRows, DEFAULT_CAP_COLS, DEFAULT_APP_COLS),
+        appRows.map(r => ({ ...r })),
+    ]);
+    record(1, 1, ms, { capAdj, working });
+
+    [working, ms] = timed(() => step2_filterDuplicates(working, DEFAULT_APP_COLS));
+    record(2, 1, ms, { working });
+
+    let result = [];
+    for (let iteration = 1; ; iteration++) {
+        [working, ms] = timed(() => step3_normalizeOrdering(working, DEFAULT_APP_COLS));
+        record(3, iteration, ms, { working });
+
+        [result, ms] = timed(() => step4_buildResultTable(working, capAdj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS));
+        record(4, iteration, ms, { result });
+
+        let updated;
+        [updated, ms] = timed(() => step5_updateNominations(working, result, DEFAULT_APP_COLS));
+        working = updated.updatedWork; result = updated.updatedResult;
+        record(5, iteration, ms, { working, result });
+
+        const before = working.length;
+        [working, ms] = timed(() => step6_resolveCycles(working, capAdj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS));
+        record(6, iteration, ms, { working });
+        if (working.length === before) break;
+    }
+    return snapshots;
+}
+
+let snapshots = pipeline();
+for (let run = 1; run < repeat; run++) {
+    const again = pipeline();
+    snapshots = snapshots.map((s, i) => ({ ...s, ms: Math.min(s.ms, again[i]?.ms ?? s.ms) }));
+}
+
+process.stdout.write(JSON.stringify({ engine: 'allSteps.ts', node: process.version, snapshots }));
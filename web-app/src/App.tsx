@@ -1,44 +1,39 @@
-import { useState, useCallback, useMemo } from 'react';
+import { useState, useCallback, useMemo, useRef, useEffect } from 'react';
 import * as XLSX from 'xlsx';
 import './App.css';
-import { readExcelSheet, getExcelSheets } from './utils/excel';
-import {
-  DEFAULT_CAP_COLS, DEFAULT_APP_COLS,
-  step1_computeOccupancy,
-  step2_filterDuplicates,
-  step3_normalizeOrdering,
-  step4_buildResultTable,
-  step5_updateNominations,
-  step6_resolveCycles,
-} from './logic/allSteps';
+import { EngineClient } from './logic/engineClient';
+import { emptyTable, filterIndices, rowsOf } from './logic/columnar';
+import type { ColumnarTable } from './logic/columnar';
+import type { EngineRequestBody, EngineResult, Target } from './logic/engineProtocol';
 
 const STEP_LABELS = ['Import', 'Filter', 'Poradie', 'Výber', 'Nominácie', 'Cykly'];
 
 /* ──────────────────── DataTable with filter + export ──────────────────── */
-function DataTable({ rows, maxRows = 500, title = 'data' }: { rows: any[]; maxRows?: number; title?: string }) {
+function DataTable({ table, maxRows = 500, title = 'data' }: { table: ColumnarTable; maxRows?: number; title?: string }) {
   const [filters, setFilters] = useState<Record<string, string>>({});
 
-  if (!rows.length) return <p className="text-muted mt-1">Žiadne dáta.</p>;
-  const cols = Object.keys(rows[0]);
-
+  // filter on the columnar buffers; row objects are built only for displayed rows
   const filtered = useMemo(() => {
     const activeFilters = Object.entries(filters).filter(([, v]) => v.trim() !== '');
-    if (activeFilters.length === 0) return rows;
-    return rows.filter(r =>
-      activeFilters.every(([col, query]) =>
-        String(r[col] ?? '').toLowerCase().includes(query.toLowerCase())
-      )
-    );
-  }, [rows, filters]);
+    if (activeFilters.length === 0) return null;
+    return filterIndices(table, activeFilters);
+  }, [table, filters]);
+
+  const filteredCount = filtered ? filtered.length : table.length;
+  const display = useMemo(
+    () => rowsOf(table, filtered ? filtered.subarray(0, maxRows) : Array.from({ length: Math.min(maxRows, table.length) }, (_, i) => i)),
+    [table, filtered, maxRows],
+  );
 
-  const display = filtered.slice(0, maxRows);
+  if (!table.length) return <p className="text-muted mt-1">Žiadne dáta.</p>;
+  const cols = table.columns.map(c => c.name);
 
   const setFilter = (col: string, val: string) =>
     setFilters(prev => ({ ...prev, [col]: val }));
 
   const exportXlsx = () => {
     const wb = XLSX.utils.book_new();
-    const ws = XLSX.utils.json_to_sheet(filtered);
+    const ws = XLSX.utils.json_to_sheet(rowsOf(table, filtered ?? undefined));
     XLSX.utils.book_append_sheet(wb, ws, 'Data');
     XLSX.writeFile(wb, `${title.replace(/\s+/g, '_')}.xlsx`);
   };
@@ -47,9 +42,9 @@ function DataTable({ rows, maxRows = 500, title = 'data' }: { rows: any[]; maxRo
     <div>
       <div className="table-toolbar">
         <span className="table-count">
-          {filtered.length === rows.length
-            ? `${rows.length} riadkov`
-            : `${filtered.length} z ${rows.length} riadkov`}
+          {filteredCount === table.length
+            ? `${table.length} riadkov`
+            : `${filteredCount} z ${table.length} riadkov`}
         </span>
         <button className="btn btn-sm btn-export" onClick={exportXlsx}>
           📥 Exportovať .xlsx
@@ -79,9 +74,9 @@ function DataTable({ rows, maxRows = 500, title = 'data' }: { rows: any[]; maxRo
             ))}
           </tbody>
         </table>
-        {filtered.length > maxRows && (
+        {filteredCount > maxRows && (
           <p className="text-muted text-center mt-1">
-            Zobrazených {maxRows} z {filtered.length} filtrovaných riadkov
+            Zobrazených {maxRows} z {filteredCount} filtrovaných riadkov
           </p>
         )}
       </div>
@@ -103,9 +98,9 @@ export default function App() {
   const [capHeader, setCapHeader] = useState(0);
   const [appHeader, setAppHeader] = useState(0);
 
-  // Raw data
-  const [capRaw, setCapRaw] = useState<any[]>([]);
-  const [appRaw, setAppRaw] = useState<any[]>([]);
+  // Raw data (columnar, decoded lazily by DataTable)
+  const [capRaw, setCapRaw] = useState<ColumnarTable>(emptyTable);
+  const [appRaw, setAppRaw] = useState<ColumnarTable>(emptyTable);
 
   // Workflow state
   const [step, setStep] = useState(0);
@@ -115,54 +110,79 @@ export default function App() {
   const [finished, setFinished] = useState(false);
 
   // Data tables
-  const [capAdj, setCapAdj] = useState<any[]>([]);
-  const [working, setWorking] = useState<any[]>([]);
-  const [result, setResult] = useState<any[]>([]);
+  const [capAdj, setCapAdj] = useState<ColumnarTable>(emptyTable);
+  const [working, setWorking] = useState<ColumnarTable>(emptyTable);
+  const [result, setResult] = useState<ColumnarTable>(emptyTable);
   const [activeTab, setActiveTab] = useState('working');
 
+  // Parsing and matching run in a Web Worker; busy holds its latest progress message
+  // and stays set until every in-flight request (e.g. both files opening) is done
+  const engineRef = useRef<EngineClient | null>(null);
+  const inFlight = useRef(0);
+  const [busy, setBusy] = useState('');
+
+  useEffect(() => {
+    const engine = new EngineClient();
+    engineRef.current = engine;
+    return () => engine.terminate();
+  }, []);
+
   const addLog = useCallback((msg: string, ok = true) => {
     setLog(prev => [...prev, { msg, ok }]);
   }, []);
 
-  /* ──── File pick → detect sheets ──── */
-  const handleCapFile = async (e: React.ChangeEvent<HTMLInputElement>) => {
-    const f = e.target.files?.[0]; if (!f) return;
-    setCapFile(f); setError(''); setCapRaw([]);
+  const applyResult = useCallback((res: EngineResult) => {
+    const t = res.tables;
+    if (t.capRaw) setCapRaw(t.capRaw);
+    if (t.appRaw) setAppRaw(t.appRaw);
+    if (t.capAdj) setCapAdj(t.capAdj);
+    if (t.working) setWorking(t.working);
+    if (t.result) setResult(t.result);
+    if (res.state) {
+      setStep(res.state.step);
+      setIteration(res.state.iteration);
+      setFinished(res.state.finished);
+    }
+    res.log.forEach(msg => addLog(msg));
+  }, [addLog]);
+
+  const callEngine = useCallback(async (body: EngineRequestBody) => {
+    inFlight.current++;
+    setBusy('Spracovávam…');
     try {
-      const sheets = await getExcelSheets(f);
-      setCapSheets(sheets);
-      const defaultSheet = sheets[0];
-      setCapSheet(defaultSheet);
-      // auto-load first sheet
-      const data = await readExcelSheet(f, defaultSheet, capHeader);
-      setCapRaw(data);
-      addLog(`Kapacity: ${data.length} riadkov z hárku "${defaultSheet}"`);
-    } catch { setError('Chyba pri čítaní súboru kapacít.'); }
-  };
+      return await engineRef.current!.request(body, msg => { setBusy(msg); addLog(msg); });
+    } finally {
+      if (--inFlight.current === 0) setBusy('');
+    }
+  }, [addLog]);
 
-  const handleAppFile = async (e: React.ChangeEvent<HTMLInputElement>) => {
-    const f = e.target.files?.[0]; if (!f) return;
-    setAppFile(f); setError(''); setAppRaw([]);
+  /* ──── File pick → detect sheets (parsed in the worker) ──── */
+  const openFile = async (target: Target, f: File) => {
+    const isCap = target === 'cap';
+    (isCap ? setCapFile : setAppFile)(f); setError('');
+    (isCap ? setCapRaw : setAppRaw)(emptyTable());
     try {
-      const sheets = await getExcelSheets(f);
-      setAppSheets(sheets);
-      const defaultIdx = Math.min(2, sheets.length - 1);
-      const defaultSheet = sheets[defaultIdx];
-      setAppSheet(defaultSheet);
-      const data = await readExcelSheet(f, defaultSheet, appHeader);
-      setAppRaw(data);
-      addLog(`Prihlášky: ${data.length} riadkov z hárku "${defaultSheet}"`);
-    } catch { setError('Chyba pri čítaní súboru prihlášok.'); }
+      const res = await callEngine({ type: 'open', target, file: f, header: isCap ? capHeader : appHeader });
+      (isCap ? setCapSheets : setAppSheets)(res.sheets ?? []);
+      (isCap ? setCapSheet : setAppSheet)(res.sheet ?? '');
+      applyResult(res);
+    } catch { setError(isCap ? 'Chyba pri čítaní súboru kapacít.' : 'Chyba pri čítaní súboru prihlášok.'); }
+  };
+
+  const handleCapFile = (e: React.ChangeEvent<HTMLInputElement>) => {
+    const f = e.target.files?.[0]; if (f) openFile('cap', f);
+  };
+
+  const handleAppFile = (e: React.ChangeEvent<HTMLInputElement>) => {
+    const f = e.target.files?.[0]; if (f) openFile('app', f);
   };
 
-  /* ──── Re-load when user changes sheet / header ──── */
+  /* ──── Re-load when user changes sheet / header (workbook stays open in the worker) ──── */
   const reloadCap = async (sheet: string, header: number) => {
     if (!capFile) return;
     setCapSheet(sheet); setCapHeader(header);
     try {
-      const data = await readExcelSheet(capFile, sheet, header);
-      setCapRaw(data);
-      addLog(`Kapacity znovu načítané: ${data.length} riadkov, hárok "${sheet}", hlavička riadok ${header}`);
+      applyResult(await callEngine({ type: 'load', target: 'cap', sheet, header }));
     } catch { setError('Chyba pri čítaní hárku kapacít.'); }
   };
 
@@ -170,87 +190,24 @@ export default function App() {
     if (!appFile) return;
     setAppSheet(sheet); setAppHeader(header);
     try {
-      const data = await readExcelSheet(appFile, sheet, header);
-      setAppRaw(data);
-      addLog(`Prihlášky znovu načítané: ${data.length} riadkov, hárok "${sheet}", hlavička riadok ${header}`);
+      applyResult(await callEngine({ type: 'load', target: 'app', sheet, header }));
     } catch { setError('Chyba pri čítaní hárku prihlášok.'); }
   };
 
   /* ──── Step runners ──── */
-  const runStep = (n: number) => {
+  const runStep = async (n: number) => {
     setError('');
     try {
-      if (n === 1) {
-        const adj = step1_computeOccupancy(capRaw, appRaw, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
-        setCapAdj(adj);
-        setWorking(appRaw.map(r => ({ ...r })));
-        addLog('Krok 1 hotový – obsadenosť vypočítaná.');
-        setStep(1);
-      } else if (n === 2) {
-        const filtered = step2_filterDuplicates(working, DEFAULT_APP_COLS);
-        addLog(`Krok 2 hotový – z ${working.length} → ${filtered.length} riadkov.`);
-        setWorking(filtered); setStep(2);
-      } else if (n === 3) {
-        const norm = step3_normalizeOrdering(working, DEFAULT_APP_COLS);
-        addLog('Krok 3 hotový – poradie prečíslované.');
-        setWorking(norm); setStep(3);
-      } else if (n === 4) {
-        const sel = step4_buildResultTable(working, capAdj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
-        addLog(`Krok 4 hotový – vybraných ${sel.length} študentov.`);
-        setResult(sel); setStep(4);
-      } else if (n === 5) {
-        const { updatedWork, updatedResult } = step5_updateNominations(working, result, DEFAULT_APP_COLS);
-        addLog('Krok 5 hotový – nominácie aktualizované.');
-        setWorking(updatedWork); setResult(updatedResult); setStep(5);
-      } else if (n === 6) {
-        const before = working.length;
-        const resolved = step6_resolveCycles(working, capAdj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
-        const diff = before - resolved.length;
-        if (diff > 0) {
-          addLog(`Krok 6 (iterácia ${iteration}) – vymazaných ${diff} riadkov.`);
-          setWorking(resolved); setIteration(p => p + 1); setStep(2);
-        } else {
-          addLog('Krok 6 hotový – žiadne ďalšie zmeny. HOTOVO! 🎉');
-          setWorking(resolved); setFinished(true); setStep(6);
-        }
-      }
+      applyResult(await callEngine({ type: 'step', step: n }));
     } catch (err: any) {
       setError(err?.message || 'Neznáma chyba.');
     }
   };
 
-  const runAll = () => {
+  const runAll = async () => {
     setError('');
     try {
-      let adj = step1_computeOccupancy(capRaw, appRaw, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
-      setCapAdj(adj);
-      let w = appRaw.map(r => ({ ...r }));
-      addLog('Krok 1 hotový.');
-
-      w = step2_filterDuplicates(w, DEFAULT_APP_COLS);
-      addLog(`Krok 2 hotový (${w.length} riadkov).`);
-
-      let iter = 1; let done = false; let res: any[] = [];
-      while (!done) {
-        w = step3_normalizeOrdering(w, DEFAULT_APP_COLS);
-        addLog(`Krok 3 (it. ${iter}) hotový.`);
-
-        const sel = step4_buildResultTable(w, adj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
-        addLog(`Krok 4 (it. ${iter}) – ${sel.length} vybraných.`);
-
-        const { updatedWork, updatedResult } = step5_updateNominations(w, sel, DEFAULT_APP_COLS);
-        w = updatedWork; res = updatedResult;
-        addLog(`Krok 5 (it. ${iter}) hotový.`);
-
-        const before = w.length;
-        w = step6_resolveCycles(w, adj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
-        if (before - w.length > 0) {
-          addLog(`Krok 6 (it. ${iter}) – vymazaných ${before - w.length} riadkov.`);
-          iter++;
-        } else { done = true; addLog(`Krok 6 (it. ${iter}) – HOTOVO! 🎉`); }
-      }
-
-      setWorking(w); setResult(res); setIteration(iter); setFinished(true); setStep(6);
+      applyResult(await callEngine({ type: 'runAll' }));
     } catch (err: any) { setError(err?.message || 'Chyba.'); }
   };
 
@@ -294,6 +251,7 @@ export default function App() {
         </div>
 
         {error && <div className="error-bar">⚠️ {error}</div>}
+        {busy && <p className="text-muted text-center mt-1">⏳ {busy}</p>}
 
         {/* ─── STEP 0: Upload ─── */}
         {step === 0 && (
@@ -374,25 +332,25 @@ export default function App() {
             {capRaw.length > 0 && (
               <div className="mt-3">
                 <h4 style={{ color: '#2563eb', marginBottom: '.5rem', textAlign: 'left' }}>
-                  📋 Kapacity – náhľad ({capRaw.length} riadkov, {Object.keys(capRaw[0]).length} stĺpcov)
+                  📋 Kapacity – náhľad ({capRaw.length} riadkov, {capRaw.columns.length} stĺpcov)
                 </h4>
-                <DataTable rows={capRaw} maxRows={15} title="Kapacity nahlad" />
+                <DataTable table={capRaw} maxRows={15} title="Kapacity nahlad" />
               </div>
             )}
             {appRaw.length > 0 && (
               <div className="mt-3">
                 <h4 style={{ color: '#7c3aed', marginBottom: '.5rem', textAlign: 'left' }}>
-                  📋 Prihlášky – náhľad ({appRaw.length} riadkov, {Object.keys(appRaw[0]).length} stĺpcov)
+                  📋 Prihlášky – náhľad ({appRaw.length} riadkov, {appRaw.columns.length} stĺpcov)
                 </h4>
-                <DataTable rows={appRaw} maxRows={15} title="Prihlasky nahlad" />
+                <DataTable table={appRaw} maxRows={15} title="Prihlasky nahlad" />
               </div>
             )}
 
             <div className="flex-center mt-4" style={{ gap: '1rem' }}>
-              <button className="btn btn-primary" disabled={!capFile || !appFile} onClick={() => runStep(1)}>
+              <button className="btn btn-primary" disabled={!capFile || !appFile || !!busy} onClick={() => runStep(1)}>
                 ▶ Spustiť Krok 1
               </button>
-              <button className="btn btn-auto" disabled={!capFile || !appFile} onClick={runAll}>
+              <button className="btn btn-auto" disabled={!capFile || !appFile || !!busy} onClick={runAll}>
                 🚀 Spustiť Všetko
               </button>
             </div>
@@ -419,7 +377,7 @@ export default function App() {
               <div className="stat-card"><div className="val">{capAdj.length}</div><div className="lbl">Inštitúty</div></div>
             </div>
             <div className="flex-center mt-3">
-              <button className="btn btn-primary" onClick={() => runStep(nextStepNum)}>
+              <button className="btn btn-primary" disabled={!!busy} onClick={() => runStep(nextStepNum)}>
                 ▶ {stepLabels[nextStepNum] || 'Ďalší krok'}
               </button>
             </div>
@@ -436,11 +394,11 @@ export default function App() {
               <button className={`tab ${activeTab === 'working' ? 'active' : ''}`} onClick={() => setActiveTab('working')}>Pracovný hárok</button>
               <button className={`tab ${activeTab === 'result' ? 'active' : ''}`} onClick={() => setActiveTab('result')}>Výsledky</button>
             </div>
-            {activeTab === 'capOrig' && <DataTable rows={capRaw} title="Kapacity vstup" />}
-            {activeTab === 'capAdj' && <DataTable rows={capAdj} title="Kapacity obsadenost" />}
-            {activeTab === 'appOrig' && <DataTable rows={appRaw} title="Prihlasky vstup" />}
-            {activeTab === 'working' && <DataTable rows={working} title="Pracovny harok" />}
-            {activeTab === 'result' && (result.length > 0 ? <DataTable rows={result} title="Vysledky" /> : <p className="text-muted">Výsledky budú po kroku 4.</p>)}
+            {activeTab === 'capOrig' && <DataTable table={capRaw} title="Kapacity vstup" />}
+            {activeTab === 'capAdj' && <DataTable table={capAdj} title="Kapacity obsadenost" />}
+            {activeTab === 'appOrig' && <DataTable table={appRaw} title="Prihlasky vstup" />}
+            {activeTab === 'working' && <DataTable table={working} title="Pracovny harok" />}
+            {activeTab === 'result' && (result.length > 0 ? <DataTable table={result} title="Vysledky" /> : <p className="text-muted">Výsledky budú po kroku 4.</p>)}
           </div>
         )}
 
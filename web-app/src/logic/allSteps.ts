@@ -38,6 +38,22 @@ function num(v: any): number {
     return Number.isFinite(n) ? n : 0;
 }
 
+// Like pd.to_numeric(errors="coerce") + sort_values(na_position="last"):
+// blank / non-numeric Pořadí sorts after every number, ties keep input order
+function orderKey(v: any): number {
+    if (v == null || str(v) === "") return Infinity;
+    const n = Number(v);
+    return Number.isFinite(n) ? n : Infinity;
+}
+
+function byOrder(orderCol: string) {
+    return (a: any, b: any) => {
+        const x = orderKey(a[orderCol]);
+        const y = orderKey(b[orderCol]);
+        return x === y ? 0 : x < y ? -1 : 1;
+    };
+}
+
 function str(v: any): string {
     return v == null ? "" : String(v).trim();
 }
@@ -120,7 +136,7 @@ export function step3_normalizeOrdering(
 
     const result: any[] = [];
     for (const group of Object.values(groups)) {
-        group.sort((a, b) => num(a[orderCol]) - num(b[orderCol]));
+        group.sort(byOrder(orderCol));
         group.forEach((r, i) => { r[orderCol] = i + 1; });
         result.push(...group);
     }
@@ -154,7 +170,7 @@ export function step4_buildResultTable(
     for (const [code, group] of Object.entries(groups)) {
         const cap = capMap[code] ?? 0;
         if (cap <= 0) continue;
-        group.sort((a, b) => num(a[orderCol]) - num(b[orderCol]));
+        group.sort(byOrder(orderCol));
         selected.push(...group.slice(0, cap));
     }
     return selected;
@@ -0,0 +1,107 @@
+/**
+ * Columnar table format shared by the engine worker and the UI.
+ * Every column is backed by a typed array, so a whole table can be posted
+ * with its buffers as transferables instead of structured-cloning row objects.
+ * String columns are dictionary-encoded: only the unique values are cloned.
+ */
+
+export type NumberColumn = { kind: 'num'; name: string; values: Float64Array };
+export type StringColumn = { kind: 'str'; name: string; codes: Int32Array; dict: string[] };
+export type Column = NumberColumn | StringColumn;
+
+export interface ColumnarTable {
+    length: number;
+    columns: Column[];
+}
+
+export const emptyTable = (): ColumnarTable => ({ length: 0, columns: [] });
+
+// ─── Encoding (worker side) ─────────────────────────────────────────
+function encodeColumn(name: string, rows: any[]): Column {
+    const n = rows.length;
+    let numeric = true;
+    for (let i = 0; i < n; i++) {
+        const v = rows[i][name];
+        if (v !== '' && v != null && typeof v !== 'number') { numeric = false; break; }
+    }
+
+    if (numeric) {
+        // empty cells (defval "") become NaN and are decoded back to ""
+        const values = new Float64Array(n);
+        for (let i = 0; i < n; i++) {
+            const v = rows[i][name];
+            values[i] = typeof v === 'number' ? v : NaN;
+        }
+        return { kind: 'num', name, values };
+    }
+
+    const codes = new Int32Array(n);
+    const dict: string[] = [];
+    const index = new Map<string, number>();
+    for (let i = 0; i < n; i++) {
+        const v = rows[i][name];
+        const s = v == null ? '' : String(v);
+        let code = index.get(s);
+        if (code === undefined) { code = dict.length; dict.push(s); index.set(s, code); }
+        codes[i] = code;
+    }
+    return { kind: 'str', name, codes, dict };
+}
+
+export function toColumnar(rows: any[]): ColumnarTable {
+    if (!rows.length) return emptyTable();
+    const names = Object.keys(rows[0]);
+    return { length: rows.length, columns: names.map(name => encodeColumn(name, rows)) };
+}
+
+export function transferList(table: ColumnarTable): ArrayBuffer[] {
+    return table.columns.map(c => (c.kind === 'num' ? c.values.buffer : c.codes.buffer) as ArrayBuffer);
+}
+
+// ─── Decoding (UI side) ─────────────────────────────────────────────
+export function cellValue(col: Column, i: number): string | number {
+    if (col.kind === 'num') {
+        const v = col.values[i];
+        return Number.isNaN(v) ? '' : v;
+    }
+    return col.dict[col.codes[i]];
+}
+
+/** Materialise row objects, only for the requested indices (display, export). */
+export function rowsOf(table: ColumnarTable, indices?: ArrayLike<number>): any[] {
+    const idx = indices ?? Array.from({ length: table.length }, (_, i) => i);
+    const rows = new Array(idx.length);
+    for (let k = 0; k < idx.length; k++) {
+        const i = idx[k];
+        const row: any = {};
+        for (const col of table.columns) row[col.name] = cellValue(col, i);
+        rows[k] = row;
+    }
+    return rows;
+}
+
+/** Indices of rows where every filtered column contains its query (case-insensitive). */
+export function filterIndices(table: ColumnarTable, filters: [string, string][]): Int32Array {
+    let mask = new Uint8Array(table.length).fill(1);
+    for (const [name, query] of filters) {
+        const col = table.columns.find(c => c.name === name);
+        if (!col) continue;
+        const q = query.toLowerCase();
+        const next = new Uint8Array(table.length);
+        if (col.kind === 'str') {
+            // test each dictionary entry once, then just look up the codes
+            const hit = col.dict.map(s => s.toLowerCase().includes(q));
+            for (let i = 0; i < table.length; i++) next[i] = mask[i] && hit[col.codes[i]] ? 1 : 0;
+        } else {
+            for (let i = 0; i < table.length; i++) {
+                next[i] = mask[i] && String(cellValue(col, i)).toLowerCase().includes(q) ? 1 : 0;
+            }
+        }
+        mask = next;
+    }
+    let count = 0;
+    for (let i = 0; i < mask.length; i++) count += mask[i];
+    const out = new Int32Array(count);
+    for (let i = 0, k = 0; i < mask.length; i++) if (mask[i]) out[k++] = i;
+    return out;
+}
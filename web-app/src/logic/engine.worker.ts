@@ -0,0 +1,183 @@
+/**
+ * Web Worker running workbook parsing and all 6 steps off the main thread.
+ * Row objects stay inside the worker; the UI receives columnar tables whose
+ * typed-array buffers are transferred, not copied.
+ */
+import type { WorkBook } from 'xlsx';
+import {
+    DEFAULT_CAP_COLS, DEFAULT_APP_COLS,
+    step1_computeOccupancy,
+    step2_filterDuplicates,
+    step3_normalizeOrdering,
+    step4_buildResultTable,
+    step5_updateNominations,
+    step6_resolveCycles,
+} from './allSteps';
+import { toColumnar, transferList } from './columnar';
+import { parseWorkbook, readSheetRows } from '../utils/excel';
+import type { EngineRequest, EngineResponse, EngineResult, EngineTables, Target } from './engineProtocol';
+
+type Progress = (message: string) => void;
+
+// ─── Worker state ───────────────────────────────────────────────────
+const workbooks: Partial<Record<Target, WorkBook>> = {};
+let capRaw: any[] = [];
+let appRaw: any[] = [];
+let capAdj: any[] = [];
+let working: any[] = [];
+let result: any[] = [];
+let iteration = 1;
+
+function encode(tables: Partial<Record<keyof EngineTables, any[]>>): EngineTables {
+    const out: EngineTables = {};
+    for (const [key, rows] of Object.entries(tables) as [keyof EngineTables, any[]][]) {
+        out[key] = toColumnar(rows);
+    }
+    return out;
+}
+
+const label = (target: Target) => (target === 'cap' ? 'Kapacity' : 'Prihlášky');
+
+// ─── Parsing ────────────────────────────────────────────────────────
+function loadSheet(target: Target, sheet: string, header: number): EngineTables {
+    const wb = workbooks[target];
+    if (!wb) throw new Error('Súbor nie je načítaný.');
+    const rows = readSheetRows(wb, sheet, header);
+    if (target === 'cap') { capRaw = rows; return encode({ capRaw }); }
+    appRaw = rows;
+    return encode({ appRaw });
+}
+
+async function openFile(target: Target, file: File, header: number, progress: Progress): Promise<EngineResult> {
+    progress(`${label(target)}: čítam súbor ${file.name}…`);
+    const wb = parseWorkbook(await file.arrayBuffer());
+    workbooks[target] = wb;
+    const sheets = wb.SheetNames;
+    const sheet = target === 'cap' ? sheets[0] : sheets[Math.min(2, sheets.length - 1)];
+    const tables = loadSheet(target, sheet, header);
+    const rows = (tables.capRaw ?? tables.appRaw)!.length;
+    return { sheets, sheet, tables, log: [`${label(target)}: ${rows} riadkov z hárku "${sheet}"`] };
+}
+
+// ─── Steps ──────────────────────────────────────────────────────────
+function runStep(n: number): EngineResult {
+    let step = n;
+    let finished = false;
+    let tables: EngineTables = {};
+    const log: string[] = [];
+
+    if (n === 1) {
+        capAdj = step1_computeOccupancy(capRaw, appRaw, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
+        working = appRaw.map(r => ({ ...r }));
+        result = [];
+        iteration = 1;
+        log.push('Krok 1 hotový – obsadenosť vypočítaná.');
+        tables = encode({ capAdj, working, result });
+    } else if (n === 2) {
+        const before = working.length;
+        working = step2_filterDuplicates(working, DEFAULT_APP_COLS);
+        log.push(`Krok 2 hotový – z ${before} → ${working.length} riadkov.`);
+        tables = encode({ working });
+    } else if (n === 3) {
+        working = step3_normalizeOrdering(working, DEFAULT_APP_COLS);
+        log.push('Krok 3 hotový – poradie prečíslované.');
+        tables = encode({ working });
+    } else if (n === 4) {
+        result = step4_buildResultTable(working, capAdj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
+        log.push(`Krok 4 hotový – vybraných ${result.length} študentov.`);
+        tables = encode({ result });
+    } else if (n === 5) {
+        const { updatedWork, updatedResult } = step5_updateNominations(working, result, DEFAULT_APP_COLS);
+        working = updatedWork; result = updatedResult;
+        log.push('Krok 5 hotový – nominácie aktualizované.');
+        tables = encode({ working, result });
+    } else if (n === 6) {
+        const before = working.length;
+        working = step6_resolveCycles(working, capAdj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
+        const diff = before - working.length;
+        if (diff > 0) {
+            log.push(`Krok 6 (iterácia ${iteration}) – vymazaných ${diff} riadkov.`);
+            iteration++;
+            step = 2;
+        } else {
+            log.push('Krok 6 hotový – žiadne ďalšie zmeny. HOTOVO! 🎉');
+            finished = true;
+        }
+        tables = encode({ working });
+    }
+
+    return { tables, state: { step, iteration, finished }, log };
+}
+
+function runAll(progress: Progress): EngineResult {
+    capAdj = step1_computeOccupancy(capRaw, appRaw, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
+    let w = appRaw.map(r => ({ ...r }));
+    progress('Krok 1 hotový.');
+
+    w = step2_filterDuplicates(w, DEFAULT_APP_COLS);
+    progress(`Krok 2 hotový (${w.length} riadkov).`);
+
+    let iter = 1; let done = false; let res: any[] = [];
+    while (!done) {
+        w = step3_normalizeOrdering(w, DEFAULT_APP_COLS);
+        progress(`Krok 3 (it. ${iter}) hotový.`);
+
+        const sel = step4_buildResultTable(w, capAdj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
+        progress(`Krok 4 (it. ${iter}) – ${sel.length} vybraných.`);
+
+        const { updatedWork, updatedResult } = step5_updateNominations(w, sel, DEFAULT_APP_COLS);
+        w = updatedWork; res = updatedResult;
+        progress(`Krok 5 (it. ${iter}) hotový.`);
+
+        const before = w.length;
+        w = step6_resolveCycles(w, capAdj, DEFAULT_CAP_COLS, DEFAULT_APP_COLS);
+        if (before - w.length > 0) {
+            progress(`Krok 6 (it. ${iter}) – vymazaných ${before - w.length} riadkov.`);
+            iter++;
+        } else { done = true; progress(`Krok 6 (it. ${iter}) – HOTOVO! 🎉`); }
+    }
+
+    working = w; result = res; iteration = iter;
+    return { tables: encode({ capAdj, working, result }), state: { step: 6, iteration, finished: true }, log: [] };
+}
+
+// ─── Message loop ───────────────────────────────────────────────────
+function post(msg: EngineResponse, transfer: ArrayBuffer[] = []) {
+    self.postMessage(msg, { transfer });
+}
+
+async function handle(req: EngineRequest, progress: Progress): Promise<EngineResult> {
+    switch (req.type) {
+        case 'open':
+            return openFile(req.target, req.file, req.header, progress);
+        case 'load': {
+            const tables = loadSheet(req.target, req.sheet, req.header);
+            const rows = (tables.capRaw ?? tables.appRaw)!.length;
+            return { sheet: req.sheet, tables, log: [`${label(req.target)} znovu načítané: ${rows} riadkov, hárok "${req.sheet}", hlavička riadok ${req.header}`] };
+        }
+        case 'step':
+            return runStep(req.step);
+        case 'runAll':
+            return runAll(progress);
+    }
+}
+
+async function respond(req: EngineRequest) {
+    const progress: Progress = message => post({ id: req.id, type: 'progress', message });
+    try {
+        const result = await handle(req, progress);
+        const transfer = Object.values(result.tables).flatMap(t => (t ? transferList(t) : []));
+        post({ id: req.id, type: 'done', result }, transfer);
+    } catch (err: any) {
+        post({ id: req.id, type: 'error', message: err?.message || 'Neznáma chyba.' });
+    }
+}
+
+// 'open' awaits file.arrayBuffer(), so requests are chained: a 'step' posted
+// while a file is still being read runs only after appRaw / capRaw are set
+let queue: Promise<void> = Promise.resolve();
+
+self.onmessage = (e: MessageEvent<EngineRequest>) => {
+    const req = e.data;
+    queue = queue.then(() => respond(req));
+};
@@ -0,0 +1,44 @@
+/**
+ * Promise wrapper around engine.worker.ts. Progress messages from the worker
+ * are forwarded to the per-request callback.
+ */
+import type { EngineRequestBody, EngineResponse, EngineResult } from './engineProtocol';
+
+type Pending = {
+    resolve: (result: EngineResult) => void;
+    reject: (error: Error) => void;
+    onProgress?: (message: string) => void;
+};
+
+export class EngineClient {
+    private worker: Worker;
+    private nextId = 1;
+    private pending = new Map<number, Pending>();
+
+    constructor() {
+        this.worker = new Worker(new URL('./engine.worker.ts', import.meta.url), { type: 'module' });
+        this.worker.onmessage = (e: MessageEvent<EngineResponse>) => {
+            const msg = e.data;
+            const entry = this.pending.get(msg.id);
+            if (!entry) return;
+            if (msg.type === 'progress') { entry.onProgress?.(msg.message); return; }
+            this.pending.delete(msg.id);
+            if (msg.type === 'done') entry.resolve(msg.result);
+            else entry.reject(new Error(msg.message));
+        };
+    }
+
+    request(body: EngineRequestBody, onProgress?: (message: string) => void): Promise<EngineResult> {
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject, onProgress });
+            this.worker.postMessage({ ...body, id });
+        });
+    }
+
+    terminate() {
+        this.worker.terminate();
+        for (const entry of this.pending.values()) entry.reject(new Error('Worker ukončený.'));
+        this.pending.clear();
+    }
+}
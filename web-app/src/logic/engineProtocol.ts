@@ -0,0 +1,43 @@
+/**
+ * Messages exchanged between App.tsx (EngineClient) and engine.worker.ts.
+ */
+import type { ColumnarTable } from './columnar';
+
+export type Target = 'cap' | 'app';
+
+export type EngineRequest =
+    | { id: number; type: 'open'; target: Target; file: File; header: number }
+    | { id: number; type: 'load'; target: Target; sheet: string; header: number }
+    | { id: number; type: 'step'; step: number }
+    | { id: number; type: 'runAll' };
+
+// Distributive Omit, so each request variant keeps its own fields
+type DistributiveOmit<T, K extends PropertyKey> = T extends unknown ? Omit<T, K> : never;
+export type EngineRequestBody = DistributiveOmit<EngineRequest, 'id'>;
+
+export interface EngineTables {
+    capRaw?: ColumnarTable;
+    appRaw?: ColumnarTable;
+    capAdj?: ColumnarTable;
+    working?: ColumnarTable;
+    result?: ColumnarTable;
+}
+
+export interface EngineState {
+    step: number;
+    iteration: number;
+    finished: boolean;
+}
+
+export interface EngineResult {
+    sheets?: string[];
+    sheet?: string;
+    tables: EngineTables;
+    state?: EngineState;
+    log: string[];
+}
+
+export type EngineResponse =
+    | { id: number; type: 'progress'; message: string }
+    | { id: number; type: 'done'; result: EngineResult }
+    | { id: number; type: 'error'; message: string };
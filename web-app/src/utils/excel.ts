@@ -1,59 +1,14 @@
 import * as XLSX from 'xlsx';
 
-export const readExcelFile = async (file: File): Promise<any[]> => {
-    return new Promise((resolve, reject) => {
-        const reader = new FileReader();
-        reader.onload = (e) => {
-            try {
-                const data = e.target?.result;
-                const workbook = XLSX.read(data, { type: 'binary' });
-                const firstSheetName = workbook.SheetNames[0]; // Default to first sheet
-                const worksheet = workbook.Sheets[firstSheetName];
-                const jsonData = XLSX.utils.sheet_to_json(worksheet, { defval: "" }); // defval to handle empty cells
-                resolve(jsonData);
-            } catch (error) {
-                reject(error);
-            }
-        };
-        reader.onerror = (error) => reject(error);
-        reader.readAsBinaryString(file);
-    });
+// Used inside the engine worker: the workbook is parsed once and kept open,
+// sheets are converted to rows only when selected.
+export const parseWorkbook = (data: ArrayBuffer): XLSX.WorkBook => {
+    return XLSX.read(new Uint8Array(data), { type: 'array' });
 };
 
-export const getExcelSheets = async (file: File): Promise<string[]> => {
-    return new Promise((resolve, reject) => {
-        const reader = new FileReader();
-        reader.onload = (e) => {
-            try {
-                const data = e.target?.result;
-                const workbook = XLSX.read(data, { type: 'binary' });
-                resolve(workbook.SheetNames);
-            } catch (error) {
-                reject(error);
-            }
-        };
-        reader.onerror = (error) => reject(error);
-        reader.readAsBinaryString(file);
-    });
-};
-
-export const readExcelSheet = async (file: File, sheetName: string, headerRow: number = 0): Promise<any[]> => {
-    return new Promise((resolve, reject) => {
-        const reader = new FileReader();
-        reader.onload = (e) => {
-            try {
-                const data = e.target?.result;
-                const workbook = XLSX.read(data, { type: 'binary' });
-                const worksheet = workbook.Sheets[sheetName];
-                // headerRow is 0-indexed. 
-                // range: n means skip n rows.
-                const jsonData = XLSX.utils.sheet_to_json(worksheet, { range: headerRow, defval: "" });
-                resolve(jsonData);
-            } catch (error) {
-                reject(error);
-            }
-        };
-        reader.onerror = (error) => reject(error);
-        reader.readAsBinaryString(file);
-    });
+export const readSheetRows = (workbook: XLSX.WorkBook, sheetName: string, headerRow: number = 0): any[] => {
+    const worksheet = workbook.Sheets[sheetName];
+    // headerRow is 0-indexed.
+    // range: n means skip n rows.
+    return XLSX.utils.sheet_to_json(worksheet, { range: headerRow, defval: "" }); // defval to handle empty cells
 };
@@ -4,4 +4,6 @@ import react from '@vitejs/plugin-react'
 // https://vite.dev/config/
 export default defineConfig({
   plugins: [react()],
+  // engine.worker.ts is created with { type: 'module' }
+  worker: { format: 'es' },
 })